@@ -1,45 +1,62 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
+from core.data_cache import load_history
+from core.scheduler import as_of_caption, watch
+from core.tracing import debug_panel, stage, start_rerun
+
+start_rerun('META')
 
 # Set the title of the Streamlit app
 st.title("Meta (META) Share Prices with Animation and EMAs")
 
+stage('load')
 # Fetch META stock data
-meta = yf.Ticker("META")
-hist = meta.history(period="1y")
+start = pd.Timestamp.today().normalize() - pd.DateOffset(years=1)
+watch(["META"], start=start)
+hist = load_history("META", start=start, max_age=None)
 
 # Reset index to get 'Date' as a column
 hist.reset_index(inplace=True)
 
+stage('indicators')
 # Calculate EMA 50 and EMA 20
 hist['EMA50'] = hist['Close'].ewm(span=50, adjust=False).mean()
 hist['EMA20'] = hist['Close'].ewm(span=20, adjust=False).mean()
 
-# Create the base figure
+# Animation settings: every frame only moves the visible date range, so each series is sent once
+animation_mode = st.radio('Animation mode', ['Growing range', 'Scrolling window'], horizontal=True)
+window_days = st.slider('Scrolling window (trading days)', 20, 250, 60, disabled=animation_mode != 'Scrolling window')
+frame_stride = st.slider('Frame stride (trading days per frame)', 1, 20, 1)
+
+# Indices of the bars each frame ends on, always including the last bar
+frame_ends = list(range(0, len(hist), frame_stride))
+if frame_ends[-1] != len(hist) - 1:
+    frame_ends.append(len(hist) - 1)
+
+# Function to get the visible x-axis range for a frame ending at bar k
+def visible_range(k):
+    if animation_mode == 'Scrolling window':
+        start = max(0, min(k - window_days + 1, len(hist) - window_days))
+    else:
+        start = 0
+    # Give the first frame a one-day span so the axis is never empty
+    end_date = max(hist['Date'][k], hist['Date'][start] + pd.Timedelta(days=1))
+    return [hist['Date'][start], end_date]
+
+stage('figure')
+# Create the base figure with the full series
 fig = go.Figure()
+fig.add_trace(go.Scatter(x=hist['Date'], y=hist['Close'], mode='lines', name='Close Price'))
+fig.add_trace(go.Scatter(x=hist['Date'], y=hist['EMA50'], mode='lines', name='EMA50'))
+fig.add_trace(go.Scatter(x=hist['Date'], y=hist['EMA20'], mode='lines', name='EMA20'))
 
-# Create frames for animation
-frames = [
-    go.Frame(
-        data=[
-            go.Scatter(x=hist['Date'][:k+1], y=hist['Close'][:k+1], mode='lines', name='Close Price'),
-            go.Scatter(x=hist['Date'][:k+1], y=hist['EMA50'][:k+1], mode='lines', name='EMA50'),
-            go.Scatter(x=hist['Date'][:k+1], y=hist['EMA20'][:k+1], mode='lines', name='EMA20')
-        ],
-        name=str(k)
-    ) for k in range(len(hist))
-]
-
-# Add the first frame manually to ensure the initial display
-fig.add_trace(go.Scatter(x=hist['Date'][:1], y=hist['Close'][:1], mode='lines', name='Close Price'))
-fig.add_trace(go.Scatter(x=hist['Date'][:1], y=hist['EMA50'][:1], mode='lines', name='EMA50'))
-fig.add_trace(go.Scatter(x=hist['Date'][:1], y=hist['EMA20'][:1], mode='lines', name='EMA20'))
+# Create layout-only frames for animation
+frames = [go.Frame(layout=dict(xaxis=dict(range=visible_range(k))), name=str(k)) for k in frame_ends]
 
 # Update the layout with frames and animation settings
 fig.update_layout(
-    xaxis=dict(range=[hist['Date'].min(), hist['Date'].max()], title='Date'),
+    xaxis=dict(range=visible_range(frame_ends[0]), title='Date'),
     yaxis=dict(range=[hist['Close'].min(), hist['Close'].max()], title='Close Price'),
     title="Meta (META) Share Prices with Animation and EMAs",
     updatemenus=[dict(type="buttons", showactive=False,
@@ -49,7 +66,7 @@ fig.update_layout(
                                                  "fromcurrent": True, "mode": "immediate"}])])],
     sliders=[{
         "steps": [{"args": [[str(k)], {"frame": {"duration": 20, "redraw": True}, "mode": "immediate"}],
-                   "label": str(hist['Date'][k].date()), "method": "animate"} for k in range(len(hist))],
+                   "label": str(hist['Date'][k].date()), "method": "animate"} for k in frame_ends],
         "transition": {"duration": 0},
         "x": 0.1,
         "len": 0.9
@@ -59,5 +76,8 @@ fig.update_layout(
 # Add frames to the figure
 fig.frames = frames
 
+stage('render')
 # Display the Plotly figure in Streamlit
 st.plotly_chart(fig)
+st.caption(as_of_caption(["META"]))
+debug_panel()
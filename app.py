@@ -0,0 +1,20 @@
+import streamlit as st
+
+# All dashboards as pages of one app: they run in one process, so they share the data provider, the
+# bar, indicator and figure caches and the background refresh, and switching pages reuses loaded data.
+#
+#   streamlit run app.py
+#
+# The page scripts still run on their own with `streamlit run <script>`.
+pages = [
+    st.Page('IAC2.py', title='Indicators and Fundamentals', default=True),
+    st.Page('hero2.py', title='Finance Data Dashboard'),
+    st.Page('stocks2.py', title='Stock Chart and Export'),
+    st.Page('theme2.py', title='Themed Stock Chart'),
+    st.Page('mae.py', title='Moving Average Envelope'),
+    st.Page('META.py', title='Animated Price History'),
+    st.Page('screener.py', title='Indicator Screener'),
+    st.Page('backtest.py', title='Strategy Parameter Sweep'),
+]
+
+st.navigation(pages).run()
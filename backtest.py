@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from plotly.subplots import make_subplots
+from core.backtest import buy_and_hold, crossover_sweep, envelope_sweep
+from core.data_cache import load_window, required_start
+from core.scheduler import as_of_caption, watch
+from core.symbols import ticker_input
+from core.tracing import debug_panel, stage, start_rerun
+
+start_rerun('backtest')
+
+st.set_page_config(page_title="Strategy Backtest", layout="wide")
+st.title('Strategy Parameter Sweep')
+
+# Strategy and the ticker and dates to test it on
+strategy = st.sidebar.radio('Strategy', ['Moving average crossover', 'Moving average envelope'])
+ticker = ticker_input('Ticker', 'GOOGL')
+col1, col2 = st.sidebar.columns(2)
+start_date = col1.date_input('Start date', pd.to_datetime('2021-01-01'))
+end_date = col2.date_input('End date', pd.to_datetime('2024-07-30'))
+cost = st.sidebar.number_input('Cost per trade (%)', min_value=0.0, max_value=5.0, value=0.1, step=0.05) / 100
+
+# Parameter grid, with the same ranges as the dashboards' sliders
+st.sidebar.header('Parameter grid')
+if strategy == 'Moving average crossover':
+    low, high = st.sidebar.slider('Short window range (days)', 5, 50, (5, 50))
+    first_values = np.arange(low, high + 1)
+    low, high = st.sidebar.slider('Long window range (days)', 50, 200, (50, 200))
+    second_values = np.arange(low, high + 1)
+    names = ('Short window', 'Long window')
+else:
+    low, high = st.sidebar.slider('MA period range (days)', 5, 200, (10, 200))
+    first_values = np.arange(low, high + 1)
+    low, high = st.sidebar.slider('Envelope range (%)', 0.5, 20.0, (0.5, 10.0), step=0.25)
+    second_values = np.arange(low, high + 0.125, 0.25)
+    names = ('MA period', 'Envelope %')
+st.sidebar.caption(f'{len(first_values) * len(second_values):,} combinations')
+
+if ticker is not None:
+    stage('load')
+    # Bars before the start date warm the longest moving average up
+    warmup_bars = int(first_values.max() if strategy == 'Moving average envelope' else second_values.max())
+    watch([ticker], start=required_start(warmup_bars, end=start_date))
+    close = load_window(ticker, start_date, end_date, warmup_bars, max_age=None)['Close']
+
+    if close[close.index >= pd.Timestamp(start_date)].empty:
+        st.error(f'No data found for ticker {ticker}.')
+    else:
+        stage('backtest')
+        sweep = crossover_sweep if strategy == 'Moving average crossover' else envelope_sweep
+        total, drawdown = sweep(close, first_values, second_values, start_date, cost)
+
+        # Crossover pairs whose short window is not shorter than the long one are not tested
+        if total.isna().all(axis=None):
+            st.warning(f'No {names[0].lower()} in the range is shorter than a {names[1].lower()}; widen the ranges to test a combination.')
+        else:
+            # Best combination by total return, next to buying and holding
+            best = total.stack().idxmax()
+            col1, col2, col3 = st.columns(3)
+            col1.metric(f'Best {names[0].lower()} / {names[1].lower()}', f'{best[0]} / {best[1]:g}')
+            col2.metric('Its total return', f'{total.loc[best] * 100:.1f}%',
+                        f'{(total.loc[best] - buy_and_hold(close, start_date)) * 100:.1f} pts vs buy and hold')
+            col3.metric('Its maximum drawdown', f'{drawdown.loc[best] * 100:.1f}%')
+
+            stage('figure')
+            fig = make_subplots(rows=1, cols=2, subplot_titles=('Total return (%)', 'Maximum drawdown (%)'),
+                                horizontal_spacing=0.12)
+            fig.add_trace(go.Heatmap(z=total.to_numpy() * 100, x=total.columns, y=total.index, colorscale='RdYlGn',
+                                     zmid=0, colorbar=dict(x=0.44), name='Total return',
+                                     hovertemplate=f'{names[0]} %{{y}}<br>{names[1]} %{{x}}<br>Return %{{z:.1f}}%<extra></extra>'),
+                          row=1, col=1)
+            fig.add_trace(go.Heatmap(z=drawdown.to_numpy() * 100, x=drawdown.columns, y=drawdown.index, colorscale='Reds_r',
+                                     name='Maximum drawdown',
+                                     hovertemplate=f'{names[0]} %{{y}}<br>{names[1]} %{{x}}<br>Drawdown %{{z:.1f}}%<extra></extra>'),
+                          row=1, col=2)
+            fig.update_xaxes(title_text=names[1])
+            fig.update_yaxes(title_text=names[0])
+            fig.update_layout(height=600, title=f'{ticker} {strategy.lower()} from {start_date} to {end_date}')
+
+            stage('render')
+            st.plotly_chart(fig, width='stretch')
+            st.caption(as_of_caption([ticker]))
+
+debug_panel()
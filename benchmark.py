@@ -0,0 +1,325 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import wait
+
+import numpy as np
+
+# Rerun-latency benchmark for the dashboard scripts. Each script is driven headlessly with
+# Streamlit's AppTest against recorded offline data (see core.providers.record_fixtures), through
+# a scripted sequence of widget interactions. For every interaction it reports cold latency
+# (caches emptied first), warm latency (caches filled), peak Python/NumPy memory of the rerun
+# and the size of the Plotly figure payload sent to the browser.
+#
+#   python benchmark.py --record                  # once, with network access, to record fixtures
+#   python benchmark.py --json bench.json         # run every script and save the results
+#   python benchmark.py hero.py --baseline bench.json   # fail if latency regressed
+#   python benchmark.py --cold-start              # time a fresh process's first run of each script
+
+# Symbols the dashboards show, recorded by --record
+TICKERS = ['GOOGL', 'AAPL', 'MSFT', 'AMZN', 'META', 'NVDA', 'EURUSD=X', 'JPY=X', 'GBPUSD=X', 'CHF=X']
+
+# Widget changes applied in order, after the first run: (name, widget type, label, new value).
+# Checkboxes take True/False; every other widget is set to the given value. A 'page' step
+# switches the multipage app to the page script given as the value.
+SCENARIOS = {
+    'app.py': [
+        ('open market dashboard', 'page', None, 'hero2.py'),
+        ('change stock', 'selectbox', 'Choose a stock', 'Apple'),
+        ('open stock chart', 'page', None, 'stocks2.py'),
+        ('back to indicators', 'page', None, 'IAC2.py'),
+    ],
+    'IAC.py': [
+        ('change ticker', 'text_input', 'Enter Stock Ticker', 'AAPL'),
+        ('move period slider', 'slider', 'Select Time Period (in days)', 90),
+        ('toggle RSI', 'checkbox', 'Add RSI Subplot', True),
+        ('toggle MACD', 'checkbox', 'Add MACD Subplot', True),
+    ],
+    'IAC2.py': [
+        ('change ticker', 'text_input', 'Enter Stock Ticker', 'AAPL'),
+        ('move period slider', 'slider', 'Select Time Period (in days)', 90),
+        ('toggle RSI', 'checkbox', 'Add RSI Subplot', True),
+        ('toggle MACD', 'checkbox', 'Add MACD Subplot', True),
+    ],
+    'hero.py': [
+        ('change stock', 'selectbox', 'Choose a stock', 'Apple'),
+        ('switch to line chart', 'selectbox', 'Choose chart template', 'Line Chart'),
+        ('switch to OHLC chart', 'selectbox', 'Choose chart template', 'OHLC Chart'),
+        ('switch to forex', 'radio', 'Choose data type', 'Forex'),
+    ],
+    'hero2.py': [
+        ('change stock', 'selectbox', 'Choose a stock', 'Apple'),
+        ('switch to Bollinger Bands', 'selectbox', 'Choose chart template', 'Candlestick with Bollinger Bands'),
+        ('move Bollinger window', 'slider', 'Bollinger Bands window (days)', 30),
+        ('switch to forex', 'radio', 'Choose data type', 'Forex'),
+    ],
+    'mae.py': [
+        ('change ticker', 'text_input', 'Enter stock ticker:', 'AAPL'),
+        ('add moving average', 'selectbox', 'Select Moving Average Period:', 50),
+        ('change envelope', 'number_input', 'Enter envelope percentage:', 2.5),
+    ],
+    'META.py': [
+        ('switch animation mode', 'radio', 'Animation mode', 'Scrolling window'),
+        ('move window slider', 'slider', 'Scrolling window (trading days)', 120),
+        ('move stride slider', 'slider', 'Frame stride (trading days per frame)', 5),
+    ],
+    'stocks2.py': [
+        ('change stock', 'selectbox', 'Select Stock', 'Apple'),
+        ('switch export format', 'radio', 'Export format', 'Parquet'),
+    ],
+    'backtest.py': [
+        ('change ticker', 'text_input', 'Ticker', 'AAPL'),
+        ('narrow long windows', 'slider', 'Long window range (days)', (100, 200)),
+        ('switch to envelope', 'radio', 'Strategy', 'Moving average envelope'),
+    ],
+    'screener.py': [
+        ('add MACD rule', 'multiselect', 'Rules', ['Close above EMA 200', 'RSI below 30', 'MACD crossed above signal']),
+        ('match any rule', 'radio', 'Show', 'Tickers matching any rule'),
+        ('screen a ticker list', 'radio', 'Universe', 'Ticker list'),
+    ],
+    'theme2.py': [
+        ('change period', 'selectbox', 'Time period', '1 year'),
+        ('change chart color', 'selectbox', 'Chart Background Color', 'Grey'),
+        ('change stock', 'selectbox', 'Stock', 'Apple'),
+    ],
+}
+
+# Function to point the data modules at offline fixtures and a scratch cache; must run before they are imported
+def configure(data_dir, cache_dir):
+    os.environ['MARKET_DATA_PROVIDER'] = 'local'
+    os.environ['MARKET_DATA_DIR'] = data_dir
+    os.environ['OHLCV_CACHE_DIR'] = os.path.join(cache_dir, 'ohlcv')
+    os.environ['SHARED_CACHE_DIR'] = os.path.join(cache_dir, 'shared')
+    os.environ['FUNDAMENTALS_CACHE_DIR'] = os.path.join(cache_dir, 'fundamentals')
+
+# Function to empty every cache the scripts read, on disk and in this process. Background refreshes
+# are finished first, so none of them writes into the fresh cache afterwards.
+def reset_caches(cache_dir):
+    from core import data_cache, figure_cache, fundamentals, indicator_cache, scheduler, shared_cache
+    with scheduler._scheduler_lock:
+        if scheduler._scheduler is not None:
+            scheduler._scheduler.stop()
+            scheduler._scheduler = None
+    with fundamentals._lock:
+        refreshing = list(fundamentals._refreshing.values())
+    wait(refreshing)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    data_cache._missing.clear()
+    shared_cache._store = None
+    with indicator_cache._lock:
+        indicator_cache._results.clear()
+        indicator_cache._versions.clear()
+    with figure_cache._lock:
+        figure_cache._figures.clear()
+    with fundamentals._lock:
+        fundamentals._entries.clear()
+        fundamentals._refreshing.clear()
+
+# Function to find a widget by type and label
+def find_widget(app, widget_type, label):
+    for widget in getattr(app, widget_type):
+        if widget.label == label:
+            return widget
+    raise LookupError(f'No {widget_type} labelled {label!r}')
+
+# Function to rerun the app and measure it: (seconds, peak bytes or None, figure payload bytes, error)
+def timed_run(app, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    payload = sum(len(chart.proto.spec) for chart in app.get('plotly_chart'))
+    error = app.exception[0].value if app.exception else None
+    return elapsed, peak, payload, error
+
+# Function to play one script's scenario from a fresh session, as {interaction: measurement}
+def play(path, scenario, trace_memory=False):
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(path, default_timeout=120)
+    results = {'first run': timed_run(app, trace_memory)}
+    for name, widget_type, label, value in scenario:
+        if widget_type == 'page':
+            app.switch_page(value)
+            results[name] = timed_run(app, trace_memory)
+            continue
+        widget = find_widget(app, widget_type, label)
+        if widget_type == 'checkbox':
+            widget.check() if value else widget.uncheck()
+        else:
+            widget.set_value(value)
+        results[name] = timed_run(app, trace_memory)
+    return results
+
+# Function to benchmark one script: cold passes start from empty caches, warm passes reuse them;
+# one extra pass of each kind runs under tracemalloc for memory, since tracing slows the rerun
+def benchmark_script(path, cache_dir, cold_repeat, warm_repeat):
+    scenario = SCENARIOS[os.path.basename(path)]
+    samples = {}
+    for kind, repeat in (('cold', cold_repeat), ('warm', warm_repeat)):
+        for number in range(repeat + 1):
+            if kind == 'cold':
+                reset_caches(cache_dir)
+            traced = number == repeat
+            for name, (elapsed, peak, payload, error) in play(path, scenario, traced).items():
+                entry = samples.setdefault(name, {'cold': [], 'warm': [], 'payload': payload, 'error': None})
+                if traced:
+                    entry[f'{kind}_peak_bytes'] = peak
+                else:
+                    entry[kind].append(elapsed)
+                entry['payload'] = payload
+                entry['error'] = entry['error'] or error
+    report = {}
+    for name, entry in samples.items():
+        report[name] = {
+            'cold_p50_ms': float(np.percentile(entry['cold'], 50) * 1000),
+            'cold_p95_ms': float(np.percentile(entry['cold'], 95) * 1000),
+            'warm_p50_ms': float(np.percentile(entry['warm'], 50) * 1000),
+            'warm_p95_ms': float(np.percentile(entry['warm'], 95) * 1000),
+            'cold_peak_mib': entry['cold_peak_bytes'] / 2 ** 20,
+            'warm_peak_mib': entry['warm_peak_bytes'] / 2 ** 20,
+            'payload_kib': entry['payload'] / 1024,
+            'error': None if entry['error'] is None else str(entry['error']),
+        }
+    return report
+
+# Libraries whose import dominates a cold start, reported when a first run pulled them in; Plotly is
+# tracked by its figure module, since Streamlit itself imports the (lazy) top-level package
+HEAVY_MODULES = ['pandas', 'pyarrow', 'plotly.graph_objs._figure', 'yfinance']
+
+# Run in a fresh interpreter by cold_start: one first run of the script, printed as JSON
+COLD_START_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+ready = time.perf_counter()
+app.run()
+done = time.perf_counter()
+print(json.dumps({
+    'framework_ms': (ready - start) * 1000,
+    'first_run_ms': (done - ready) * 1000,
+    'heavy_modules': [name for name in sys.argv[2:] if name in sys.modules],
+    'error': str(app.exception[0].value) if app.exception else None,
+}))
+'''
+
+# Function to time a script's first run in a new process, so the page pays for every import it makes;
+# the process start-up is measured from the parent, the rest inside the probe
+def cold_start(path, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', COLD_START_PROBE, path, *HEAVY_MODULES],
+                                capture_output=True, text=True, check=True).stdout
+        sample = json.loads(output.splitlines()[-1])
+        sample['total_ms'] = (time.perf_counter() - start) * 1000
+        samples.append(sample)
+    return {
+        'total_p50_ms': float(np.percentile([sample['total_ms'] for sample in samples], 50)),
+        'first_run_p50_ms': float(np.percentile([sample['first_run_ms'] for sample in samples], 50)),
+        'heavy_modules': samples[-1]['heavy_modules'],
+        'error': samples[-1]['error'],
+    }
+
+# Function to print the cold-start table
+def print_cold_start(results):
+    header = f'{"script":16} {"total p50":>10} {"first run p50":>14}  heavy modules loaded'
+    print(header)
+    print('-' * len(header))
+    for script, row in results.items():
+        print(f'{script:16} {row["total_p50_ms"]:10.1f} {row["first_run_p50_ms"]:14.1f}  {", ".join(row["heavy_modules"]) or "-"}')
+        if row['error']:
+            print(f'    error: {row["error"]}')
+
+# Function to print a results table
+def print_report(results):
+    header = f'{"script / interaction":44} {"cold p50":>9} {"cold p95":>9} {"warm p50":>9} {"warm p95":>9} {"peak MiB":>9} {"fig KiB":>8}'
+    print(header)
+    print('-' * len(header))
+    for script, report in results.items():
+        for name, row in report.items():
+            print(f'{script + " / " + name:44} {row["cold_p50_ms"]:9.1f} {row["cold_p95_ms"]:9.1f} '
+                  f'{row["warm_p50_ms"]:9.1f} {row["warm_p95_ms"]:9.1f} '
+                  f'{max(row["cold_peak_mib"], row["warm_peak_mib"]):9.1f} {row["payload_kib"]:8.1f}')
+            if row['error']:
+                print(f'    error: {row["error"]}')
+
+# Function to list the p95 latencies that grew by more than `tolerance` (a fraction) over a baseline run
+def regressions(results, baseline, tolerance):
+    found = []
+    for script, report in results.items():
+        for name, row in report.items():
+            old = baseline.get(script, {}).get(name)
+            if old is None:
+                continue
+            for metric in ('cold_p95_ms', 'warm_p95_ms'):
+                if row[metric] > old[metric] * (1 + tolerance):
+                    found.append(f'{script} / {name}: {metric} {old[metric]:.1f} -> {row[metric]:.1f}')
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard rerun latency against recorded offline data.')
+    parser.add_argument('scripts', nargs='*', default=list(SCENARIOS), help='scripts to benchmark (default: all)')
+    parser.add_argument('--data', default='fixtures', help='directory of recorded bars and fundamentals')
+    parser.add_argument('--record', action='store_true', help='record fixtures from Yahoo Finance and exit')
+    parser.add_argument('--cold', type=int, default=5, help='timed passes from empty caches')
+    parser.add_argument('--warm', type=int, default=20, help='timed passes with filled caches')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='results file to compare p95 latencies against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 growth over the baseline')
+    parser.add_argument('--cold-start', type=int, nargs='?', const=5, metavar='N',
+                        help='instead time N (default 5) first runs of each script in a fresh process')
+    args = parser.parse_args()
+
+    if args.record:
+        from core.providers import GuardedProvider, YFinanceProvider, record_fixtures
+        record_fixtures(GuardedProvider(YFinanceProvider()), TICKERS, args.data)
+        return 0
+    if not os.path.isdir(args.data):
+        parser.error(f'no fixtures in {args.data!r}; record them first with --record')
+
+    # Background refresh failures and Streamlit's bare-mode warnings would drown the report
+    logging.disable(logging.WARNING)
+    cache_dir = tempfile.mkdtemp(prefix='benchmark-cache-')
+    configure(os.path.abspath(args.data), cache_dir)
+    results = {}
+    try:
+        for script in args.scripts:
+            if args.cold_start:
+                # The data is cached once first, so the timing is imports and rendering, not downloads
+                cold_start(os.path.abspath(script), 1)
+                results[os.path.basename(script)] = cold_start(os.path.abspath(script), args.cold_start)
+            else:
+                results[os.path.basename(script)] = benchmark_script(os.path.abspath(script), cache_dir, args.cold, args.warm)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    if args.cold_start:
+        print_cold_start(results)
+    else:
+        print_report(results)
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(results, out, indent=2)
+    if args.baseline and not args.cold_start:
+        with open(args.baseline) as baseline_file:
+            found = regressions(results, json.load(baseline_file), args.tolerance)
+        for line in found:
+            print(f'REGRESSION {line}')
+        return 1 if found else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# Shared data, indicator and chart code for the dashboard scripts. Nothing is imported here, so a
+# page only loads the modules (and the heavy libraries behind them) it actually uses.
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import indicators
+from .tracing import span
+
+# Parameter-sweep backtester. A whole grid of strategy parameters is evaluated at once: indicator
+# lines come from the batched indicator engine, positions for every (a, b) pair are broadcast
+# into one (a x b x bars) array, and equity is the cumulative sum of log returns along the bars.
+# Positions are decided at a bar's close and held over the next bar; the strategies are long or flat.
+
+# Grid cells (parameter pairs x bars) evaluated per chunk, which bounds the temporary arrays' memory
+MAX_CELLS = int(os.environ.get('BACKTEST_MAX_CELLS', '1000000'))
+
+# Function to hold a position from each entry until the next exit; an exit on the same bar wins
+def hold(entries, exits):
+    bars = np.arange(entries.shape[-1])
+    last_entry = np.maximum.accumulate(np.where(entries, bars, -1), axis=-1)
+    last_exit = np.maximum.accumulate(np.where(exits, bars, -1), axis=-1)
+    return (last_entry > last_exit).astype(float)
+
+# Function to score positions (... x bars, 1 long and 0 flat) against the bars' log returns, paying
+# `cost` (a fraction) per change of position; returns (total return, maximum drawdown) as fractions
+def performance(positions, log_returns, cost=0.0):
+    held = np.concatenate([np.zeros(positions.shape[:-1] + (1,)), positions[..., :-1]], axis=-1)
+    trades = np.abs(np.diff(positions, axis=-1, prepend=0.0))
+    log_equity = np.cumsum(held * log_returns + trades * np.log1p(-cost), axis=-1)
+    # The running peak starts at the initial equity (log 0)
+    peak = np.maximum(np.maximum.accumulate(log_equity, axis=-1), 0.0)
+    return np.expm1(log_equity[..., -1]), np.expm1((log_equity - peak).min(axis=-1))
+
+# Function to get the closes as floats and their log returns (0 on the first bar)
+def _log_returns(close):
+    prices = close.to_numpy(dtype=float)
+    return prices, np.log(prices / np.concatenate([prices[:1], prices[:-1]]))
+
+# Function to split the first axis of a grid into chunks of at most MAX_CELLS cells
+def _chunks(rows, cells_per_row):
+    step = max(1, MAX_CELLS // max(1, cells_per_row))
+    return [slice(start, start + step) for start in range(0, rows, step)]
+
+# Function to turn (rows x columns) arrays into labelled frames
+def _frames(values, index, columns):
+    return [pd.DataFrame(array, index=index, columns=columns) for array in values]
+
+# Function to sweep a moving average crossover: long while the short MA is above the long MA, as the
+# hero dashboards draw them (rolling means with min_periods=1). `close` may start before `start`
+# to warm the averages up; only bars from `start` on are traded. Returns (total return, max drawdown)
+# frames indexed by short window with a column per long window; pairs with short >= long are NaN.
+def crossover_sweep(close, short_windows, long_windows, start=None, cost=0.0):
+    short_windows, long_windows = np.asarray(short_windows), np.asarray(long_windows)
+    first = 0 if start is None else close.index.searchsorted(pd.Timestamp(start))
+    prices, log_returns = _log_returns(close)
+    total = np.full((len(short_windows), len(long_windows)), np.nan)
+    drawdown = total.copy()
+    with span('backtest'):
+        short_ma = indicators.sma(prices[None, :], short_windows, min_periods=1)[:, 0, first:]
+        long_ma = indicators.sma(prices[None, :], long_windows, min_periods=1)[:, 0, first:]
+        log_returns = log_returns[first:]
+        for rows in _chunks(len(short_windows), len(long_windows) * len(log_returns)):
+            positions = (short_ma[rows, None, :] > long_ma[None, :, :]).astype(float)
+            total[rows], drawdown[rows] = performance(positions, log_returns, cost)
+    valid = short_windows[:, None] < long_windows[None, :]
+    total[~valid] = drawdown[~valid] = np.nan
+    return _frames((total, drawdown), pd.Index(short_windows, name='Short window'),
+                   pd.Index(long_windows, name='Long window'))
+
+# Function to sweep a moving average envelope, as mae.py draws it: buy when the close falls below
+# the lower envelope and sell when it rises above the upper one. Returns (total return, max drawdown)
+# frames indexed by MA period with a column per envelope percentage.
+def envelope_sweep(close, periods, envelope_pcts, start=None, cost=0.0):
+    periods, envelope_pcts = np.asarray(periods), np.asarray(envelope_pcts, dtype=float)
+    first = 0 if start is None else close.index.searchsorted(pd.Timestamp(start))
+    prices, log_returns = _log_returns(close)
+    total = np.empty((len(periods), len(envelope_pcts)))
+    drawdown = np.empty_like(total)
+    with span('backtest'):
+        # The bands are built a chunk at a time from the moving averages, like indicators.envelope does
+        ma = indicators.sma(prices[None, :], periods)[:, 0, first:]
+        widths = envelope_pcts[None, :, None] / 100
+        prices, log_returns = prices[first:], log_returns[first:]
+        for rows in _chunks(len(periods), len(envelope_pcts) * len(log_returns)):
+            # NaN bands (before an MA has its full window) compare False, so no trades happen there
+            positions = hold(prices < ma[rows, None, :] * (1 - widths), prices > ma[rows, None, :] * (1 + widths))
+            total[rows], drawdown[rows] = performance(positions, log_returns, cost)
+    return _frames((total, drawdown), pd.Index(periods, name='MA period'),
+                   pd.Index(envelope_pcts, name='Envelope %'))
+
+# Function to get the buy-and-hold return over the traded bars, for comparison
+def buy_and_hold(close, start=None):
+    first = 0 if start is None else close.index.searchsorted(pd.Timestamp(start))
+    prices = close.to_numpy(dtype=float)[first:]
+    return prices[-1] / prices[0] - 1 if len(prices) else np.nan
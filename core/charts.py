@@ -0,0 +1,23 @@
+from .downsample import bucket_ohlc, lttb
+
+# Plotly is imported inside the functions that draw, so pages and code paths that never draw skip it
+
+# Function to create a line trace, downsampled with LTTB to the chart's point budget
+def line_trace(series, **kwargs):
+    import plotly.graph_objects as go
+    series = lttb(series)
+    return go.Scatter(x=series.index, y=series, mode='lines', **kwargs)
+
+# Function to create an OHLC or Candlestick trace, bucketing bars down to the chart's point budget
+def ohlc_trace(data, chart_type='ohlc', name=None):
+    import plotly.graph_objects as go
+    data = bucket_ohlc(data)
+    trace_type = go.Ohlc if chart_type == 'ohlc' else go.Candlestick
+    return trace_type(x=data.index, open=data['Open'], high=data['High'], low=data['Low'], close=data['Close'],
+                      name=name or ('OHLC' if chart_type == 'ohlc' else 'Candlestick'))
+
+# Function to create a volume bar trace, summing volume into the same buckets as the price bars
+def volume_trace(data, **kwargs):
+    import plotly.graph_objects as go
+    volume = bucket_ohlc(data[['Volume']])['Volume']
+    return go.Bar(x=volume.index, y=volume, **kwargs)
@@ -0,0 +1,69 @@
+import html
+import json
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# Page regions a theme colors; they read CSS variables the switcher sets in the browser and only
+# apply once a theme has been chosen, so until then the page keeps its configured Streamlit theme
+THEME_CSS = """
+<style>
+html[data-app-theme] [data-testid="stAppViewContainer"] {
+    background-color: var(--app-background);
+    color: var(--app-text);
+}
+html[data-app-theme] [data-testid="stHeader"],
+html[data-app-theme] [data-testid="stToolbar"],
+html[data-app-theme] [data-testid="stSidebar"] {
+    background-color: var(--app-chrome);
+}
+</style>
+"""
+
+# Switcher widget; it runs in the component iframe and restyles the parent page directly, keeping
+# the choice in the browser's localStorage so it survives reruns and visits without the server
+SWITCHER_HTML = """
+<div style="font-family: 'Source Sans Pro', sans-serif; font-size: 15px;">{control}</div>
+<script>
+const themes = {themes};
+const storageKey = {storage_key};
+const root = window.parent.document.documentElement;
+const control = document.getElementById('theme-control');
+const isCheckbox = control.type === 'checkbox';
+const names = Object.keys(themes);
+function apply(name) {{
+    const theme = themes[name];
+    for (const [part, value] of Object.entries(theme)) {{
+        root.style.setProperty('--app-' + part, value);
+    }}
+    root.dataset.appTheme = name;
+    document.body.style.color = theme.text;
+    if (isCheckbox) {{
+        control.checked = name === names[1];
+    }} else {{
+        control.value = name;
+    }}
+    document.getElementById('theme-current').textContent = name;
+    window.localStorage.setItem(storageKey, name);
+}}
+control.addEventListener('change', () => apply(isCheckbox ? names[control.checked ? 1 : 0] : control.value));
+const stored = window.localStorage.getItem(storageKey);
+apply(stored in themes ? stored : {default});
+</script>
+"""
+
+# Function to render a per-browser theme switcher. themes maps each theme name to its
+# {'background', 'text', 'chrome'} colors. With checkbox_label set (two themes only), the
+# switcher is a checkbox that selects the second theme; otherwise it is a dropdown.
+# Switching restyles the page in the browser: no rerun, no reload and no shared config write.
+def theme_switcher(themes, default, label='Choose a theme:', checkbox_label=None, storage_key='app-theme'):
+    if checkbox_label is not None:
+        control = f'<label><input type="checkbox" id="theme-control"> {html.escape(checkbox_label)}</label>'
+    else:
+        options = ''.join(f'<option value="{html.escape(name)}">{html.escape(name)}</option>' for name in themes)
+        control = f'<label>{html.escape(label)} <select id="theme-control">{options}</select></label>'
+    control += '<p>Current theme is: <span id="theme-current"></span></p>'
+    st.markdown(THEME_CSS, unsafe_allow_html=True)
+    components.html(SWITCHER_HTML.format(control=control, themes=json.dumps(themes),
+                                         storage_key=json.dumps(storage_key), default=json.dumps(default)),
+                    height=80)
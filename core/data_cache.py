@@ -0,0 +1,308 @@
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from .providers import empty_frame, get_provider
+from .shared_cache import get_store
+from .streaming import advance, dump_states, load_states
+from .tracing import count, span
+
+# Directory holding one Parquet file of daily bars per ticker
+CACHE_DIR = os.environ.get('OHLCV_CACHE_DIR', os.path.join('.cache', 'ohlcv'))
+
+# Seconds a shared in-memory copy is served before the provider is asked for new bars again
+REFRESH_SECONDS = float(os.environ.get('OHLCV_REFRESH_SECONDS', '900'))
+
+# Largest rounding error, in price units, accepted for storing a ticker's prices as float32;
+# past roughly 2000 a float32 step exceeds it and the prices stay float64
+PRICE_TOLERANCE = float(os.environ.get('OHLCV_PRICE_TOLERANCE', '1e-4'))
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close']
+
+# Relative change in a stored, final close past which the provider is taken to have re-adjusted the
+# history (yfinance prices are split- and dividend-adjusted, so the whole history moves at once)
+ADJUSTMENT_TOLERANCE = float(os.environ.get('OHLCV_ADJUSTMENT_TOLERANCE', '1e-5'))
+
+# Seconds a ticker the provider had no bars for is answered as empty without asking again
+MISSING_TTL = float(os.environ.get('OHLCV_MISSING_TTL', '3600'))
+
+# Negative cache: upper-case ticker -> time its download last came back empty
+_missing = {}
+
+# Function to check whether a ticker came back empty less than MISSING_TTL seconds ago
+def is_missing(ticker):
+    missing_at = _missing.get(ticker.upper())
+    return missing_at is not None and time.time() - missing_at < MISSING_TTL
+
+# Function to build the cache file path for a ticker
+def cache_path(ticker):
+    safe_name = ticker.upper().replace('/', '_')
+    return os.path.join(CACHE_DIR, f'{safe_name}.parquet')
+
+# Function to list the tickers that have bars in the disk cache
+def cached_tickers():
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    return sorted(name[:-len('.parquet')] for name in os.listdir(CACHE_DIR)
+                  if name.endswith('.parquet') and not name.endswith('.indicators.parquet'))
+
+# Function to build the path of a file stored next to a ticker's bars
+def sidecar_path(ticker, suffix):
+    return cache_path(ticker)[:-len('.parquet')] + suffix
+
+# Function to read the stored history for a ticker, or None if nothing is cached yet
+def read_cached(ticker):
+    path = cache_path(ticker)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+# Function to write a cache file through a temporary file, so readers never see a partial one
+def replace_atomically(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Threads of one process may write the same file at once, so the temporary name is per thread
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+# Function to write text to a cache file atomically
+def write_text(path, text):
+    def write(tmp_path):
+        with open(tmp_path, 'w') as out:
+            out.write(text)
+    replace_atomically(path, write)
+
+# Function to write the history for a ticker, replacing the old file atomically
+def write_cached(ticker, data):
+    replace_atomically(cache_path(ticker), data.to_parquet)
+
+# Function to shrink bars for caching: float32 prices where that costs at most PRICE_TOLERANCE, and
+# volume as the narrowest whole-number type that holds it. The date index keeps its 8-byte
+# timestamps, which map without conversion; a narrower date type would be copied on every read.
+def compact_bars(data):
+    if data.empty:
+        return data
+    columns = {}
+    for column, values in data.items():
+        if column in PRICE_COLUMNS and values.dtype == 'float64':
+            narrow = values.astype('float32')
+            if not (narrow.astype('float64') - values).abs().max() > PRICE_TOLERANCE:
+                values = narrow
+        elif column == 'Volume' and values.notna().all() and (values % 1 == 0).all():
+            values = values.astype('uint32' if values.min() >= 0 and values.max() < 2 ** 32 else 'int64')
+        columns[column] = values
+    return pd.DataFrame(columns, index=data.index)
+
+# Function to append freshly downloaded bars to the cached ones
+def merge_tail(cached, tail):
+    if tail.empty:
+        return cached
+    # The tail wins on overlap, so a partial bar from the last run gets replaced
+    data = pd.concat([cached[cached.index < tail.index[0]], tail])
+    return data[~data.index.duplicated(keep='last')]
+
+# Function to check whether freshly downloaded bars put the last final cached bar (the one before the
+# last, which may have been written mid-session) at another price, i.e. the provider re-adjusted them
+def readjusted(cached, fresh):
+    if len(cached) < 2:
+        return False
+    day = cached.index[-2]
+    if day not in fresh.index:
+        return False
+    for column in ('Close', 'Adj Close'):
+        if column in cached.columns and column in fresh.columns:
+            old, new = float(cached.at[day, column]), float(fresh.at[day, column])
+            if not math.isclose(old, new, rel_tol=ADJUSTMENT_TOLERANCE, abs_tol=PRICE_TOLERANCE):
+                return True
+    return False
+
+# Function to read the first date a ticker's cache covers (None means its full history) and when it was last refreshed
+def read_meta(ticker):
+    path = sidecar_path(ticker, '.meta.json')
+    if not os.path.exists(path):
+        return None, None
+    with open(path) as meta_file:
+        meta = json.load(meta_file)
+    start = meta['start']
+    return None if start is None else pd.Timestamp(start), meta.get('refreshed_at')
+
+# Function to check whether cached bars starting at `coverage` include everything from `start` on
+def covers(coverage, start):
+    return coverage is None or (start is not None and coverage <= pd.Timestamp(start))
+
+# Function to record a refresh of a ticker's bars on disk and in memory; coverage is the first date they cover (None for all history)
+def store_history(ticker, data, coverage, changed=True):
+    coverage = None if coverage is None else pd.Timestamp(coverage)
+    refreshed_at = time.time()
+    if changed:
+        data = compact_bars(data)
+        write_cached(ticker, data)
+    write_text(sidecar_path(ticker, '.meta.json'),
+               json.dumps({'start': None if coverage is None else str(coverage.date()), 'refreshed_at': refreshed_at}))
+    remember(ticker, data, coverage, refreshed_at, changed)
+
+# Function to publish a ticker's bars to the node-wide memory-mapped cache (only the metadata if unchanged)
+def remember(ticker, data, coverage, refreshed_at, changed=True):
+    meta = {'start': None if coverage is None else str(pd.Timestamp(coverage).date()), 'refreshed_at': refreshed_at}
+    get_store().publish(ticker.upper(), meta, data if changed else None)
+
+# Function to get a ticker's shared bars if they cover `start` and were refreshed at most max_age seconds ago (None for any age)
+def recall(ticker, start=None, max_age=REFRESH_SECONDS):
+    entry = get_store().lookup(ticker.upper())
+    if entry is None:
+        return None
+    data, meta = entry
+    coverage = None if meta['start'] is None else pd.Timestamp(meta['start'])
+    refreshed_at = meta['refreshed_at']
+    if not covers(coverage, start):
+        return None
+    if max_age is not None and (refreshed_at is None or time.time() - refreshed_at > max_age):
+        return None
+    return data
+
+# Function to get a ticker's bars from the disk cache without contacting the provider, or None if they do not cover `start`
+def read_stored(ticker, start=None):
+    cached = read_cached(ticker)
+    coverage, refreshed_at = read_meta(ticker)
+    if cached is None or cached.empty or not covers(coverage, start):
+        return None
+    # Files written before the bars were compacted are shrunk on their way into shared memory
+    remember(ticker, compact_bars(cached), coverage, refreshed_at)
+    # Hand back the shared mapping rather than this process's private copy
+    return recall(ticker, start, max_age=None)
+
+# Function to get whatever bars are cached for a ticker, shared or on disk, whatever their coverage or age (None if there are none)
+def cached_history(ticker):
+    entry = get_store().lookup(ticker.upper())
+    if entry is not None:
+        return entry[0]
+    return read_cached(ticker)
+
+# Function to get when a ticker's bars were last refreshed from the provider, as a datetime (None if unknown)
+def data_as_of(ticker):
+    entry = get_store().lookup(ticker.upper())
+    refreshed_at = entry[1]['refreshed_at'] if entry is not None else read_meta(ticker)[1]
+    return None if refreshed_at is None else datetime.fromtimestamp(refreshed_at)
+
+# Function to bring a ticker's disk cache up to date from `start`, fetching only the missing head and tail
+def refresh_history(ticker, start=None):
+    cached = read_cached(ticker)
+    coverage, _ = read_meta(ticker)
+    if cached is None or cached.empty:
+        with span('download'):
+            data = get_provider().download(ticker, start=start)
+        coverage = start
+    else:
+        # Re-request the last two stored days: the last may have been written mid-session, and the
+        # one before shows whether the stored prices are still on the provider's basis
+        with span('download'):
+            tail = get_provider().download(ticker, start=cached.index[-min(len(cached), 2)])
+        if readjusted(cached, tail):
+            # Every stored bar is on the old basis, so the whole covered range is fetched again
+            count('bars', 'readjusted')
+            if not covers(coverage, start):
+                coverage = start
+            with span('download'):
+                data = get_provider().download(ticker, start=coverage)
+        else:
+            data = cached
+            if not covers(coverage, start):
+                with span('download'):
+                    head = get_provider().download(ticker, start=start, end=cached.index[0])
+                data = pd.concat([head[cached.columns.intersection(head.columns)], data])
+                coverage = start
+            data = merge_tail(data, tail[cached.columns.intersection(tail.columns)])
+    if data.empty:
+        # Nothing to store or share: the miss is kept in this process only, and expires after MISSING_TTL
+        now = time.time()
+        for stale in [name for name, missing_at in _missing.items() if now - missing_at >= MISSING_TTL]:
+            del _missing[stale]
+        _missing[ticker.upper()] = now
+    else:
+        _missing.pop(ticker.upper(), None)
+        store_history(ticker, data, coverage, changed=data is not cached)
+    return data
+
+# Function to load a ticker's daily history from `start` (None for all of it) to today.
+# In-memory copies younger than max_age are served without any I/O; with max_age=None any cached
+# copy is served as is (a background refresher keeps it current) and only a cold miss fetches.
+# The result is a read-only view of the shared bars: add derived columns through an
+# overlay.FrameOverlay rather than into the frame. A ticker the provider had no bars for is
+# answered with an empty frame for MISSING_TTL seconds.
+def load_history(ticker, start=None, max_age=REFRESH_SECONDS):
+    if is_missing(ticker):
+        count('bars', 'missing')
+        return empty_frame()
+    data = recall(ticker, start, max_age)
+    if data is not None:
+        count('bars', 'hit')
+    elif max_age is None:
+        data = read_stored(ticker, start)
+        if data is not None:
+            count('bars', 'disk')
+    if data is None:
+        count('bars', 'miss')
+        fetched = refresh_history(ticker, start)
+        # Serve the shared mapping like any later hit, not the private download
+        data = recall(ticker, start, max_age=None)
+        if data is None:
+            data = fetched
+    # Slicing by position yields a new frame over the same columns; a boolean mask would copy them
+    first = 0 if start is None else data.index.searchsorted(pd.Timestamp(start))
+    return data.iloc[first:]
+
+# Function to work out the first date to fetch so that `bars` trading days end at `end` (default today)
+def required_start(bars, end=None):
+    end = pd.Timestamp.today().normalize() if end is None else pd.Timestamp(end)
+    # About 252 trading days per 365 calendar days, plus a week of slack for holidays
+    return end - pd.Timedelta(days=math.ceil(bars * 365 / 252) + 7)
+
+# Function to load the bars in [start, end) plus `warmup_bars` earlier trading days for indicator look-back
+def load_window(ticker, start, end, warmup_bars, max_age=REFRESH_SECONDS):
+    data = load_history(ticker, start=required_start(warmup_bars, end=start), max_age=max_age)
+    return data.iloc[:data.index.searchsorted(pd.Timestamp(end))]
+
+# Function to check a close recorded with indicator states against the current one (a NaN close matches NaN)
+def same_close(recorded, close):
+    if recorded is None:
+        return False
+    return recorded == float(close) or (math.isnan(recorded) and math.isnan(close))
+
+# Function to get indicator columns for a ticker's bars, advancing the stored streaming states
+# over the new bars only. make_states() returns a fresh {column name: state} mapping.
+def load_indicators(ticker, data, make_states):
+    states_path = sidecar_path(ticker, '.state.json')
+    values_path = sidecar_path(ticker, '.indicators.parquet')
+    states = make_states()
+    stored = pd.DataFrame(index=data.index[:0])
+    closes = data['Close']
+    if os.path.exists(states_path) and os.path.exists(values_path):
+        with open(states_path) as state_file:
+            stored_states, as_of, as_of_close = load_states(state_file.read())
+        same_spec = [(name, type(state)) for name, state in stored_states.items()] == \
+            [(name, type(state)) for name, state in states.items()]
+        stored = pd.read_parquet(values_path)
+        # States are only reusable if they were built from the same first bar, and from the same
+        # prices: a re-adjusted history changes the close they were committed at
+        same_start = len(stored) > 0 and len(data) > 0 and stored.index[0] == data.index[0]
+        same_prices = as_of in data.index and same_close(as_of_close, closes.at[as_of])
+        if same_spec and same_start and same_prices:
+            states = stored_states
+            stored = stored[stored.index <= as_of]
+            closes = closes[closes.index > as_of]
+        else:
+            stored = pd.DataFrame(index=data.index[:0])
+    count('indicator_states', 'hit' if len(closes) < len(data) else 'miss')
+    with span('indicators'):
+        rows = advance(states, closes)
+    committed = pd.concat([stored, rows.iloc[:-1]]) if len(stored) else rows.iloc[:-1]
+    if len(rows) > 1:
+        replace_atomically(values_path, committed.to_parquet)
+        as_of = committed.index[-1]
+        write_text(states_path, dump_states(states, as_of, float(data['Close'].at[as_of])))
+    return pd.concat([committed, rows.iloc[-1:]])
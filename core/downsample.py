@@ -0,0 +1,60 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Points kept per trace; a chart is only ~1000 px wide, so more than this is never visible
+MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', '1000'))
+
+# How each OHLCV column is combined when several bars share a bucket
+OHLC_AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last', 'Volume': 'sum'}
+
+# Function to pick the indices Largest-Triangle-Three-Buckets keeps out of (x, y)
+def lttb_indices(x, y, max_points):
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    # Bucket boundaries for everything between the fixed first and last points
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    keep = np.empty(max_points, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        # Keep the point forming the largest triangle with the last kept point and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+# Function to downsample a line series with LTTB, dropping NaN points (e.g. indicator warm-up) first
+def lttb(series, max_points=MAX_POINTS):
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    index = series.index
+    if isinstance(index, pd.DatetimeIndex):
+        x = index.asi8.astype(float)
+    else:
+        x = np.arange(len(series), dtype=float)
+    keep = lttb_indices(x, series.to_numpy(dtype=float), max_points)
+    return series.iloc[keep]
+
+# Function to merge consecutive OHLCV bars into at most max_points buckets (first/max/min/last, summed volume)
+def bucket_ohlc(data, max_points=MAX_POINTS):
+    if len(data) <= max_points:
+        return data
+    size = math.ceil(len(data) / max_points)
+    groups = np.arange(len(data)) // size
+    aggregation = {column: OHLC_AGGREGATION.get(column, 'last') for column in data.columns}
+    bucketed = data.groupby(groups).agg(aggregation)
+    # Label each bucket with the date of its first bar
+    bucketed.index = data.index[::size]
+    return bucketed
@@ -0,0 +1,90 @@
+import io
+import os
+import tempfile
+import zipfile
+
+import pyarrow as pa
+import streamlit as st
+
+from .overlay import FrameOverlay
+
+# Rows converted and written at a time, so an export never holds a second full copy of the data
+CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', '50000'))
+
+# Exports larger than this are written to a temporary file on disk instead of built up in memory
+SPOOL_BYTES = int(os.environ.get('EXPORT_SPOOL_BYTES', str(16 * 1024 * 1024)))
+
+# Function to split a frame (or FrameOverlay) into DataFrames of at most CHUNK_ROWS rows, with the chosen columns
+def chunks(frame, columns=None):
+    for first in range(0, len(frame), CHUNK_ROWS):
+        chunk = frame[first:first + CHUNK_ROWS]
+        if isinstance(chunk, FrameOverlay):
+            chunk = chunk.to_frame()
+        yield chunk if columns is None else chunk[[column for column in columns if column in chunk.columns]]
+
+# Function to write a frame as CSV, dates included, one chunk at a time
+def write_csv(frame, out, columns=None):
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    for number, chunk in enumerate(chunks(frame, columns)):
+        chunk.to_csv(text, header=number == 0, index_label=chunk.index.name or 'Date')
+    # Leave the underlying stream open for the caller
+    text.flush()
+    text.detach()
+
+# Function to write a frame through a pyarrow writer opened on its first chunk's schema
+def write_batches(frame, out, columns, open_writer):
+    writer = schema = None
+    try:
+        for chunk in chunks(frame, columns):
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=True)
+            if writer is None:
+                schema = table.schema
+                writer = open_writer(out, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+# Function to write a frame as Parquet, dates included, one row group per chunk
+def write_parquet(frame, out, columns=None):
+    # The Parquet writer is only loaded by pages that export Parquet
+    import pyarrow.parquet as pq
+    write_batches(frame, out, columns, pq.ParquetWriter)
+
+# Function to write a frame as an Arrow IPC file, dates included, one record batch per chunk
+def write_arrow(frame, out, columns=None):
+    write_batches(frame, out, columns, pa.ipc.new_file)
+
+# File extension, MIME type and writer of each export format
+FORMATS = {
+    'CSV': ('csv', 'text/csv', write_csv),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', write_parquet),
+    'Arrow': ('arrow', 'application/vnd.apache.arrow.file', write_arrow),
+}
+
+# Function to export the frames load_frame(name) returns for each name in a format: one file for a
+# single name, otherwise a zip with one file per name. Frames are loaded one at a time as they are
+# written into a spool file, and the finished export is returned as bytes, which is what
+# st.download_button serves (it does not accept the spool file itself).
+def export_file(names, load_frame, fmt, columns=None):
+    extension, _, write = FORMATS[fmt]
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as out:
+        if len(names) == 1:
+            write(load_frame(names[0]), out, columns)
+        else:
+            with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as bundle:
+                for name in names:
+                    with bundle.open(f'{name}.{extension}', 'w') as entry:
+                        write(load_frame(name), entry, columns)
+        out.seek(0)
+        return out.read()
+
+# Function to show a download button for an export of export_file(names, load_frame, fmt, columns).
+# Nothing is loaded or written until the button is clicked, and clicking it does not rerun the app.
+def export_button(names, load_frame, file_stem, fmt, columns=None, label=None, key=None):
+    extension, mime, _ = FORMATS[fmt]
+    if len(names) > 1:
+        extension, mime = 'zip', 'application/zip'
+    st.download_button(label=label or f'Download {fmt}', data=lambda: export_file(names, load_frame, fmt, columns),
+                       file_name=f'{file_stem}.{extension}', mime=mime, on_click='ignore', key=key,
+                       disabled=not names)
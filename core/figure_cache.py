@@ -0,0 +1,44 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .tracing import count, span
+
+# Built figures kept per process; the least recently shown ones are dropped first
+MAX_FIGURES = int(os.environ.get('FIGURE_CACHE_SIZE', '64'))
+
+# Figures cached by what their traces show (symbol, range, indicator settings) and tagged with the
+# data version they were built from. Cosmetic settings (colors, fonts, template) are not part of
+# the key: they are applied to the cached figure as a layout patch, which costs a fraction of
+# rebuilding its traces.
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+# Function to get the figure for `key` with the `layout` patch applied, calling build() only when
+# the key has no figure for this data version. The figure is shared between sessions, so it is
+# yielded under a lock: render it inside the block and change it only through `layout`, which
+# should set the same layout properties on every call.
+@contextmanager
+def styled_figure(key, version, build, layout):
+    with _lock:
+        entry = _figures.get(key)
+        if entry is not None:
+            _figures.move_to_end(key)
+    count('figures', 'miss' if entry is None or entry['version'] != version else 'hit')
+    if entry is None or entry['version'] != version:
+        with span('figure'):
+            figure = build()
+        entry = {'version': version, 'figure': figure, 'layout': None, 'lock': threading.Lock()}
+        with _lock:
+            _figures[key] = entry
+            _figures.move_to_end(key)
+            while len(_figures) > MAX_FIGURES:
+                _figures.popitem(last=False)
+    with entry['lock']:
+        if entry['layout'] != layout:
+            with span('figure.patch'):
+                entry['figure'].update_layout(**layout)
+            entry['layout'] = layout
+        yield entry['figure']
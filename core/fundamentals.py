@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .data_cache import write_text
+from .providers import get_provider
+from .tracing import count, span
+
+logger = logging.getLogger(__name__)
+
+# Directory holding one JSON file of fundamentals per ticker
+CACHE_DIR = os.environ.get('FUNDAMENTALS_CACHE_DIR', os.path.join('.cache', 'fundamentals'))
+
+# Seconds a field stays fresh; ratios that move with the share price go stale sooner than reported figures
+FIELD_TTLS = {
+    'trailingPE': 3600,
+    'priceToBook': 3600,
+    'dividendYield': 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+# How long a ticker with nothing cached at all may hold up the page before its fields show as missing
+COLD_WAIT_SECONDS = float(os.environ.get('FUNDAMENTALS_COLD_WAIT', '2'))
+
+_entries = {}
+_refreshing = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='fundamentals')
+
+# Function to build the cache file path for a ticker
+def cache_path(ticker):
+    return os.path.join(CACHE_DIR, ticker.upper().replace('/', '_') + '.json')
+
+# Function to get a ticker's cached {'fetched_at': ..., 'info': {...}} entry from memory or disk, or None
+def cached_entry(ticker):
+    with _lock:
+        entry = _entries.get(ticker)
+    if entry is None and os.path.exists(cache_path(ticker)):
+        with open(cache_path(ticker)) as entry_file:
+            entry = json.load(entry_file)
+        with _lock:
+            entry = _entries.setdefault(ticker, entry)
+    return entry
+
+# Function to check whether any of the fields (all cached ones if None) is past its TTL
+def is_stale(entry, fields=None):
+    age = time.time() - entry['fetched_at']
+    return any(age > FIELD_TTLS.get(field, DEFAULT_TTL) for field in (entry['info'] if fields is None else fields))
+
+# Function to fetch one ticker's fundamentals and store them in memory and on disk
+def _refresh(ticker):
+    try:
+        with span('download.fundamentals'):
+            entry = {'fetched_at': time.time(), 'info': get_provider().info(ticker)}
+        with _lock:
+            _entries[ticker] = entry
+        write_text(cache_path(ticker), json.dumps(entry, default=str))
+    except Exception:
+        logger.warning('Fundamentals refresh for %s failed', ticker, exc_info=True)
+    finally:
+        with _lock:
+            _refreshing.pop(ticker, None)
+
+# Function to start a background refresh for a ticker unless one is already running
+def schedule_refresh(ticker):
+    with _lock:
+        future = _refreshing.get(ticker)
+        if future is None:
+            future = _refreshing[ticker] = _executor.submit(_refresh, ticker)
+    return future
+
+# Function to get {ticker: {field: value}} for many tickers at once. Cached values are returned
+# immediately even when stale (a refresh runs in the background); only tickers with nothing
+# cached are waited for, and for at most COLD_WAIT_SECONDS.
+def get_fundamentals(tickers, fields=None, cold_wait=COLD_WAIT_SECONDS):
+    cold = []
+    for ticker in tickers:
+        entry = cached_entry(ticker)
+        if entry is None:
+            count('fundamentals', 'miss')
+            cold.append(schedule_refresh(ticker))
+        elif is_stale(entry, fields):
+            count('fundamentals', 'stale')
+            schedule_refresh(ticker)
+        else:
+            count('fundamentals', 'hit')
+    if cold:
+        wait(cold, timeout=cold_wait)
+    results = {}
+    for ticker in tickers:
+        info = (cached_entry(ticker) or {'info': {}})['info']
+        results[ticker] = {field: value for field, value in info.items() if fields is None or field in fields}
+    return results
@@ -0,0 +1,66 @@
+import os
+import threading
+
+import pandas as pd
+
+from .memory import ByteBudgetLRU
+from .tracing import count, span
+
+# Memoized indicator columns, keyed by (ticker, indicator, params) and tagged with the data
+# version they were computed from. Indicators are always computed over the full series, so
+# slicing a window for display never changes their values.
+
+# Function to compute an EMA, as add_ema does
+def ema(data, span):
+    return data['Close'].ewm(span=span, adjust=False).mean()
+
+# Function to compute RSI with simple rolling averages, as add_rsi does
+def rsi(data, window=14, min_periods=None):
+    delta = data['Close'].diff(1)
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=window, min_periods=min_periods).mean()
+    avg_loss = loss.rolling(window=window, min_periods=min_periods).mean()
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+# Function to compute the MACD and signal lines, as add_macd does
+def macd(data, fast=12, slow=26, signal=9):
+    short_ema = data['Close'].ewm(span=fast, adjust=False).mean()
+    long_ema = data['Close'].ewm(span=slow, adjust=False).mean()
+    macd_line = short_ema - long_ema
+    return pd.DataFrame({'MACD': macd_line, 'Signal Line': macd_line.ewm(span=signal, adjust=False).mean()})
+
+INDICATORS = {'ema': ema, 'rsi': rsi, 'macd': macd}
+
+# Bytes of indicator columns kept; past it the least recently used are dropped and recomputed on demand
+INDICATOR_BYTES = int(os.environ.get('INDICATOR_CACHE_BYTES', str(128 * 2 ** 20)))
+
+_results = ByteBudgetLRU('indicators', INDICATOR_BYTES)
+_versions = {}
+_lock = threading.Lock()
+
+# Function to identify a version of a ticker's bars cheaply (a refresh changes the length or the last bar)
+def data_version(data):
+    if data.empty:
+        return (0,)
+    return (len(data), data.index[0], data.index[-1], float(data['Close'].iloc[-1]))
+
+# Function to get an indicator for a ticker's full series, computing it at most once per data version
+def get_indicator(ticker, data, name, **params):
+    version = data_version(data)
+    key = (ticker, name, tuple(sorted(params.items())))
+    with _lock:
+        if _versions.get(ticker) != version:
+            # New bars arrived: drop everything computed from the old version of this ticker
+            _results.discard(lambda k: k[0] == ticker)
+            _versions[ticker] = version
+        result = _results.get(key)
+    count('indicators', 'miss' if result is None else 'hit')
+    if result is None:
+        with span('indicators'):
+            result = INDICATORS[name](data, **params)
+        with _lock:
+            if _versions.get(ticker) == version:
+                _results.put(key, result)
+    return result
@@ -0,0 +1,200 @@
+import streamlit as st
+
+from .charts import line_trace, ohlc_trace
+from .data_cache import load_history, required_start
+from .fundamentals import get_fundamentals
+from .indicator_cache import get_indicator
+from .overlay import FrameOverlay
+from .scheduler import as_of_caption, watch
+from .symbols import ticker_input
+from .tracing import debug_panel, stage, start_rerun
+
+# Price chart with EMA, RSI and MACD indicators for one ticker, optionally with fundamental metric
+# tiles; IAC.py and IAC2.py are this page without and with the fundamentals
+
+# Longest selectable display window and the look-back the slowest indicator (EMA_200) needs before it
+MAX_PERIOD = 365
+WARMUP_BARS = 200
+
+# Fields behind each metric tile
+METRIC_FIELDS = {
+    'P/E Ratio': 'trailingPE',
+    'ROE': 'returnOnEquity',
+    'ROA': 'returnOnAssets',
+    'Gross Margin': 'grossMargins',
+    'Profit Margin': 'profitMargins',
+    'Debt to Equity': 'debtToEquity',
+    'Current Ratio': 'currentRatio',
+    'Price to Book': 'priceToBook',
+    'Earnings Per Share': 'trailingEps',
+    'Dividend Yield': 'dividendYield',
+}
+
+# Reads only the cache; the background scheduler keeps it fresh, so only a never-seen ticker waits on the network
+def load_data(ticker, start, with_fundamentals=False):
+    watch([ticker], start, with_fundamentals=with_fundamentals)
+    data = load_history(ticker, start=start, max_age=None)
+    # Indicator columns go into an overlay, leaving the cached bars untouched
+    return FrameOverlay(data)
+
+def add_ema(data, periods, ticker):
+    for period in periods:
+        data[f'EMA_{period}'] = get_indicator(ticker, data.base, 'ema', span=period)
+    return data
+
+def add_rsi(data, ticker, window=14):
+    data['RSI'] = get_indicator(ticker, data.base, 'rsi', window=window)
+    return data
+
+def add_macd(data, ticker):
+    macd = get_indicator(ticker, data.base, 'macd')
+    data['MACD'] = macd['MACD']
+    data['Signal Line'] = macd['Signal Line']
+    return data
+
+# Fundamentals come from their own TTL cache, which serves stale values while refreshing in the background
+def get_fundamental_metrics(ticker):
+    info = get_fundamentals([ticker], fields=list(METRIC_FIELDS.values()))[ticker]
+    metrics = {label: info.get(field, 'N/A') for label, field in METRIC_FIELDS.items()}
+
+    # Round off the metrics to 2 decimal points
+    for key, value in metrics.items():
+        if isinstance(value, (int, float)):
+            metrics[key] = round(value, 2)
+        elif value == 'N/A':
+            metrics[key] = 'N/A'
+        else:
+            try:
+                metrics[key] = round(float(value), 2)
+            except ValueError:
+                metrics[key] = 'N/A'
+
+    return metrics
+
+# Function to show the selected fundamental metrics as tiles
+def show_fundamentals(ticker):
+    # Choose fundamental metrics to display
+    st.subheader('Select Fundamental Metrics to Display')
+    metrics = get_fundamental_metrics(ticker)
+    selected_metrics = st.multiselect('Choose metrics', list(metrics.keys()), default=['P/E Ratio', 'ROE', 'Profit Margin'])
+
+    # Display selected fundamental metrics
+    if selected_metrics:
+        st.subheader('Fundamental Metrics')
+
+        # Create rows with up to 3 metrics each
+        for i in range(0, len(selected_metrics), 3):
+            cols = st.columns(3)
+            for j in range(3):
+                if i + j < len(selected_metrics):
+                    metric = selected_metrics[i + j]
+                    cols[j].metric(label=metric, value=metrics[metric])
+
+# Function to build the price chart with its EMA lines and the optional RSI and MACD subplots
+def indicator_figure(ticker, data_period, selected_emas, add_rsi_plot, add_macd_plot):
+    from plotly.subplots import make_subplots
+
+    # Define the number of rows for subplots
+    rows = 1 + add_rsi_plot + add_macd_plot
+
+    # Calculate dynamic y-axis ranges
+    rsi_range = [0, 100]
+
+    # Initialize macd_range with default values
+    macd_range = [0, 0]
+
+    # Update macd_range if MACD data is present
+    if add_macd_plot:
+        macd_range = [
+            min(data_period['MACD'].min(), data_period['Signal Line'].min()) * 1.05,
+            max(data_period['MACD'].max(), data_period['Signal Line'].max()) * 1.05
+        ]
+
+    # Create subplots
+    fig = make_subplots(rows=rows, cols=1, shared_xaxes=True,
+                        vertical_spacing=0.15,
+                        row_heights=[0.5] + [0.25] * (rows - 1),
+                        subplot_titles=('Price', 'RSI', 'MACD')[:rows])
+
+    # Candlestick chart
+    fig.add_trace(ohlc_trace(data_period.base, 'candlestick', name='Candlesticks'), row=1, col=1)
+
+    # Add EMAs to the chart
+    for period in selected_emas:
+        fig.add_trace(line_trace(data_period[f'EMA_{period}'], name=f'EMA_{period}'), row=1, col=1)
+
+    current_row = 2
+    if add_rsi_plot:
+        fig.add_trace(line_trace(data_period['RSI'], name='RSI'), row=current_row, col=1)
+        fig.update_yaxes(range=rsi_range, row=current_row, col=1, title='RSI')
+        current_row += 1
+
+    if add_macd_plot:
+        fig.add_trace(line_trace(data_period['MACD'], name='MACD'), row=current_row, col=1)
+        fig.add_trace(line_trace(data_period['Signal Line'], name='Signal Line'), row=current_row, col=1)
+        fig.update_yaxes(range=macd_range, row=current_row, col=1, title='MACD')
+
+    # Update layout
+    fig.update_layout(
+        title=f'{ticker} Stock Price and Indicators',
+        xaxis_title='Date',
+        yaxis_title='Price',
+        height=400 + 200 * (rows - 1),
+        margin=dict(l=50, r=50, t=50, b=50),
+        legend=dict(x=0, y=1, traceorder='normal'),
+        xaxis_rangeslider_visible=False,
+        hovermode='x unified'  # Show hover information on x-axis
+    )
+    return fig
+
+# Function to run the page; `script` names it in the timings and metrics
+def main(script, title, with_fundamentals=False):
+    start_rerun(script)
+    st.title(title)
+
+    # Unknown tickers are turned away here, before the scheduler or the cache sees them
+    ticker = ticker_input('Enter Stock Ticker', 'GOOGL')
+    if ticker is None:
+        debug_panel()
+        return
+
+    stage('load')
+    data = load_data(ticker, required_start(MAX_PERIOD + WARMUP_BARS), with_fundamentals)
+
+    stage('controls')
+    # Select time period
+    periods = st.slider('Select Time Period (in days)', 30, MAX_PERIOD, 180)
+
+    # Select EMA
+    selected_emas = st.multiselect('Select EMA periods', [200, 50, 20], default=[200, 50, 20])
+
+    # Choose to add RSI or MACD
+    add_rsi_plot = st.checkbox('Add RSI Subplot')
+    add_macd_plot = st.checkbox('Add MACD Subplot')
+
+    if with_fundamentals:
+        stage('fundamentals')
+        show_fundamentals(ticker)
+
+    stage('indicators')
+    # Prepare data with selected EMAs, computed once over the loaded range
+    data = add_ema(data, selected_emas, ticker)
+
+    # Add RSI if selected
+    if add_rsi_plot:
+        data = add_rsi(data, ticker)
+
+    # Add MACD if selected
+    if add_macd_plot:
+        data = add_macd(data, ticker)
+
+    # Filter data for the selected period
+    data_period = data[-periods:]
+
+    stage('figure')
+    fig = indicator_figure(ticker, data_period, selected_emas, add_rsi_plot, add_macd_plot)
+
+    stage('render')
+    st.plotly_chart(fig)
+    st.caption(as_of_caption([ticker]))
+    debug_panel()
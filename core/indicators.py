@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+# Batched indicator engine. Every function takes a (tickers x bars) float matrix, NaN-padded
+# where a ticker has no bar, and returns arrays with a leading axis per parameter list.
+# Each row gives the same numbers as the per-Series pandas code in the apps.
+
+# Function to align the given column of several OHLCV frames into one (tickers x bars) matrix
+def price_matrix(frames, column='Close'):
+    aligned = pd.concat({ticker: frame[column] for ticker, frame in frames.items()}, axis=1).sort_index()
+    return list(aligned.columns), aligned.index, aligned.to_numpy(dtype=float).T
+
+# Function to turn a scalar or a sequence of parameters into a 1-D array
+def _as_params(values):
+    return np.atleast_1d(np.asarray(values))
+
+# Function to compute EMAs for every span in one pass over the bars, like Series.ewm(span=..., adjust=False).mean()
+def ema(prices, spans):
+    prices = np.asarray(prices, dtype=float)
+    alpha = (2.0 / (_as_params(spans).astype(float) + 1.0))[:, None]
+    decay = 1.0 - alpha
+    shape = (alpha.shape[0], prices.shape[0])
+    weighted = np.full(shape, np.nan)
+    old_wt = np.ones(shape)
+    out = np.empty(shape + (prices.shape[1],))
+    for t in range(prices.shape[1]):
+        cur = np.broadcast_to(prices[:, t], shape)
+        is_obs = ~np.isnan(cur)
+        has_value = ~np.isnan(weighted)
+        # Gaps keep decaying the old weight, matching pandas' ignore_na=False
+        old_wt = np.where(has_value, old_wt * decay, old_wt)
+        update = has_value & is_obs & (weighted != cur)
+        weighted = np.where(update, (old_wt * weighted + alpha * cur) / (old_wt + alpha), weighted)
+        old_wt = np.where(has_value & is_obs, 1.0, old_wt)
+        start = ~has_value & is_obs
+        weighted = np.where(start, cur, weighted)
+        old_wt = np.where(start, 1.0, old_wt)
+        out[:, :, t] = weighted
+    return out
+
+# Function to compute rolling sums, squared sums and counts of non-NaN values along the last axis
+def _rolling_sums(values, window):
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    pad = [(0, 0)] * (values.ndim - 1) + [(1, 0)]
+    csum = np.pad(np.cumsum(filled, axis=-1), pad)
+    ccount = np.pad(np.cumsum(valid, axis=-1), pad)
+    csq = np.pad(np.cumsum(filled * filled, axis=-1), pad)
+    idx = np.arange(1, values.shape[-1] + 1)
+    start = np.maximum(idx - window, 0)
+    total = np.take(csum, idx, axis=-1) - np.take(csum, start, axis=-1)
+    count = np.take(ccount, idx, axis=-1) - np.take(ccount, start, axis=-1)
+    squares = np.take(csq, idx, axis=-1) - np.take(csq, start, axis=-1)
+    return total, count, squares
+
+# Function to compute a rolling mean and sample standard deviation, like Series.rolling(window, min_periods)
+def _rolling_mean_std(values, window, min_periods):
+    # Centre each row on its first valid value so the cumulative sums stay well conditioned
+    offset = _first_valid(values)
+    total, count, squares = _rolling_sums(values - offset, window)
+    enough = count >= max(min_periods, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        var = (squares - total * mean) / (count - 1)
+    mean = np.where(enough, mean + offset, np.nan)
+    std = np.where(enough & (count > 1), np.sqrt(np.maximum(var, 0.0)), np.nan)
+    return mean, std
+
+# Function to pick each row's first non-NaN value (0 for all-NaN rows)
+def _first_valid(values):
+    valid = ~np.isnan(values)
+    first = np.argmax(valid, axis=-1)[..., None]
+    picked = np.take_along_axis(values, first, axis=-1)
+    return np.where(np.isnan(picked), 0.0, picked)
+
+# Function to compute simple moving averages for every window
+def sma(prices, windows, min_periods=None):
+    prices = np.asarray(prices, dtype=float)
+    return np.stack([_rolling_mean_std(prices, int(w), int(w) if min_periods is None else min_periods)[0]
+                     for w in _as_params(windows)])
+
+# Function to compute RSI with simple rolling averages of gains and losses, as add_rsi does
+def rsi(prices, windows=14, min_periods=None):
+    prices = np.asarray(prices, dtype=float)
+    delta = np.diff(prices, axis=-1, prepend=np.nan)
+    # NaN deltas count as zero, except in the padding before a ticker's first bar
+    started = np.maximum.accumulate(~np.isnan(prices), axis=-1)
+    gain = np.where(started, np.where(delta > 0, delta, 0.0), np.nan)
+    loss = np.where(started, np.where(delta < 0, -delta, 0.0), np.nan)
+    out = []
+    for w in _as_params(windows):
+        periods = int(w) if min_periods is None else min_periods
+        avg_gain = _rolling_mean_std(gain, int(w), periods)[0]
+        avg_loss = _rolling_mean_std(loss, int(w), periods)[0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out.append(100 - (100 / (1 + avg_gain / avg_loss)))
+    return np.stack(out)
+
+# Function to compute MACD and signal lines, as add_macd does
+def macd(prices, fast=12, slow=26, signal=9):
+    fast_ema, slow_ema = ema(prices, [fast, slow])
+    macd_line = fast_ema - slow_ema
+    return macd_line, ema(macd_line, signal)[0]
+
+# Function to compute Bollinger Bands, as calculate_bollinger_bands does; upper/lower are (windows x std devs x tickers x bars)
+def bollinger(prices, windows=20, num_std_devs=2, min_periods=1):
+    prices = np.asarray(prices, dtype=float)
+    k = _as_params(num_std_devs).astype(float)[:, None, None]
+    middle, upper, lower = [], [], []
+    for w in _as_params(windows):
+        mean, std = _rolling_mean_std(prices, int(w), min_periods)
+        middle.append(mean)
+        upper.append(mean + k * std)
+        lower.append(mean - k * std)
+    return np.stack(middle), np.stack(upper), np.stack(lower)
+
+# Function to compute moving average envelopes, as calculate_moving_average_envelope does; upper/lower are (windows x pcts x tickers x bars)
+def envelope(prices, windows, envelope_pcts):
+    ma = sma(prices, windows)
+    pct = _as_params(envelope_pcts).astype(float)[None, :, None, None] / 100
+    return ma, ma[:, None] * (1 + pct), ma[:, None] * (1 - pct)
@@ -0,0 +1,171 @@
+import pandas as pd
+import streamlit as st
+
+from .charts import line_trace, ohlc_trace
+from .data_cache import load_window, required_start
+from .figure_cache import styled_figure
+from .indicator_cache import data_version
+from .overlay import FrameOverlay
+from .scheduler import as_of_caption, watch
+from .tracing import debug_panel, stage, start_rerun
+
+# Stock and forex chart dashboard with moving averages and, optionally, Bollinger Bands; hero.py and
+# hero2.py are this page without and with the Bollinger template
+
+# Symbols offered for each data type
+stocks = {'Google': 'GOOGL', 'Apple': 'AAPL', 'Microsoft': 'MSFT', 'Amazon': 'AMZN'}
+forex_pairs = {'USD/EUR': 'EURUSD=X', 'USD/JPY': 'JPY=X', 'GBP/USD': 'GBPUSD=X', 'USD/CHF': 'CHF=X'}
+
+# Bars loaded before the start date so the longest moving average is warmed up on the first shown day
+WARMUP_BARS = 200
+
+# Function to calculate Bollinger Bands
+def calculate_bollinger_bands(data, window=20, num_std_dev=2):
+    data['Middle Band'] = data['Close'].rolling(window=window, min_periods=1).mean()
+    data['Upper Band'] = data['Middle Band'] + num_std_dev * data['Close'].rolling(window=window, min_periods=1).std()
+    data['Lower Band'] = data['Middle Band'] - num_std_dev * data['Close'].rolling(window=window, min_periods=1).std()
+    return data
+
+# Function to run the page; `script` names it in the timings and metrics
+def main(script, with_bollinger=False):
+    start_rerun(script)
+
+    # Streamlit application
+    st.set_page_config(page_title="Finance Data Dashboard", layout="wide")
+    st.title('Finance Data Dashboard')
+
+    # Sidebar for data type selection
+    st.sidebar.header('Select Data Type')
+    data_type = st.sidebar.radio('Choose data type', ['Stock', 'Forex'])
+
+    # Sidebar for chart template selection
+    st.sidebar.header('Select Chart Template')
+    if data_type == 'Stock':
+        chart_templates = ['Candlestick with MA', 'Line Chart', 'Moving Averages Only', 'OHLC Chart']
+        if with_bollinger:
+            chart_templates.append('Candlestick with Bollinger Bands')
+    else:
+        chart_templates = ['Line Chart', 'OHLC Chart']  # Removed 'Candlestick Chart' for Forex
+
+    chart_template = st.sidebar.selectbox('Choose chart template', chart_templates)
+
+    # Date range selection
+    col1, col2 = st.sidebar.columns(2)
+    start_date = col1.date_input('Start date', pd.to_datetime('2023-01-01'))
+    end_date = col2.date_input('End date', pd.to_datetime('2024-07-30'))
+
+    # Keep every symbol cached and refreshed in the background, so switching symbols is a cache hit
+    watch(list(stocks.values()) + list(forex_pairs.values()), start=required_start(WARMUP_BARS, end=start_date))
+
+    if data_type == 'Stock':
+        # Stock selection
+        stock = st.sidebar.selectbox('Choose a stock', list(stocks.keys()))
+        ticker = stocks[stock]
+        title = f'{stock} Stock Price'
+
+        # Everything besides the data that changes the traces, for the figure cache key
+        chart_settings = [chart_template]
+
+        stage('load')
+        # Fetch stock data, including the warm-up bars; indicators are added to an overlay, not the cached bars
+        data = FrameOverlay(load_window(ticker, start_date, end_date, WARMUP_BARS, max_age=None))
+
+        stage('indicators')
+        # Moving averages
+        if chart_template in ['Candlestick with MA', 'Moving Averages Only', 'Candlestick with Bollinger Bands']:
+            st.sidebar.header('Moving Averages')
+            short_window = st.sidebar.slider('Short window (days)', 5, 50, 20)
+            long_window = st.sidebar.slider('Long window (days)', 50, 200, 100)
+            chart_settings += [short_window, long_window]
+
+            # Calculate moving averages
+            data['Short_MA'] = data['Close'].rolling(window=short_window, min_periods=1).mean()
+            data['Long_MA'] = data['Close'].rolling(window=long_window, min_periods=1).mean()
+
+        # Bollinger Bands
+        if chart_template in ['Candlestick with Bollinger Bands']:
+            st.sidebar.header('Bollinger Bands')
+            boll_window = st.sidebar.slider('Bollinger Bands window (days)', 5, 50, 20)
+            num_std_dev = st.sidebar.slider('Number of standard deviations', 1, 5, 2)
+            chart_settings += [boll_window, num_std_dev]
+            data = calculate_bollinger_bands(data, window=boll_window, num_std_dev=num_std_dev)
+
+        # Drop the warm-up bars now that the indicators are computed
+        data = data.since(start_date)
+
+        # Plotting stock data
+        st.header(f'{stock} Stock Chart')
+
+        # Function to add the stock chart's traces
+        def add_traces(fig):
+            if chart_template == 'Candlestick with MA':
+                fig.add_trace(ohlc_trace(data.base, 'candlestick'))
+                fig.add_trace(line_trace(data['Short_MA'], name=f'Short {short_window}-day MA', line=dict(color='blue')))
+                fig.add_trace(line_trace(data['Long_MA'], name=f'Long {long_window}-day MA', line=dict(color='red')))
+
+            elif chart_template == 'Line Chart':
+                fig.add_trace(line_trace(data['Close'], name='Close Price'))
+
+            elif chart_template == 'Moving Averages Only':
+                fig.add_trace(line_trace(data['Short_MA'], name=f'Short {short_window}-day MA', line=dict(color='blue')))
+                fig.add_trace(line_trace(data['Long_MA'], name=f'Long {long_window}-day MA', line=dict(color='red')))
+
+            elif chart_template == 'OHLC Chart':
+                fig.add_trace(ohlc_trace(data.base, 'ohlc'))
+
+            elif chart_template == 'Candlestick with Bollinger Bands':
+                fig.add_trace(ohlc_trace(data.base, 'candlestick'))
+                fig.add_trace(line_trace(data['Middle Band'], name=f'{boll_window}-day Middle Band', line=dict(color='orange')))
+                fig.add_trace(line_trace(data['Upper Band'], name=f'Upper Band ({num_std_dev} std dev)', line=dict(color='green')))
+                fig.add_trace(line_trace(data['Lower Band'], name=f'Lower Band ({num_std_dev} std dev)', line=dict(color='red')))
+
+    elif data_type == 'Forex':
+        # Forex selection
+        forex_pair = st.sidebar.selectbox('Choose a forex pair', list(forex_pairs.keys()))
+        ticker = forex_pairs[forex_pair]
+        title = f'{forex_pair} Exchange Rate'
+
+        stage('load')
+        # Fetch forex data
+        chart_settings = [chart_template]
+        data = FrameOverlay(load_window(ticker, start_date, end_date, 0, max_age=None)).since(start_date)
+
+        # Plotting forex data
+        st.header(f'{forex_pair} Forex Chart')
+
+        # Function to add the forex chart's traces
+        def add_traces(fig):
+            if chart_template == 'Line Chart':
+                fig.add_trace(line_trace(data['Close'], name='Close Price'))
+            elif chart_template == 'OHLC Chart':
+                fig.add_trace(ohlc_trace(data.base, 'ohlc'))
+            # Removed the Candlestick Chart option for Forex
+
+    # Function to build the chart; it only runs when the symbol, dates, chart settings or data changed
+    def build_chart():
+        import plotly.graph_objects as go
+        fig = go.Figure()
+        add_traces(fig)
+
+        # Customize layout
+        fig.update_layout(
+            title=title,
+            xaxis_title='Date',
+            yaxis_title='Price' if data_type == 'Stock' else 'Exchange Rate',
+            xaxis_rangeslider_visible=False,
+            height=600
+        )
+        return fig
+
+    stage('render')
+    # Display chart; the template is a layout patch on the cached figure rather than part of its build
+    chart_key = ('hero', ticker, start_date, end_date, *chart_settings)
+    with styled_figure(chart_key, data_version(data.base), build_chart, dict(template='plotly_dark')) as fig:
+        st.plotly_chart(fig, width='stretch')
+    st.caption(as_of_caption([ticker]))
+
+    # Display data table
+    if st.checkbox('Show raw data'):
+        st.write(data.to_frame())
+
+    debug_panel()
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+
+from .tracing import report_memory
+
+# Function to measure the bytes a frame or series (or a tuple/list of them) holds, index included
+def frame_bytes(value):
+    if isinstance(value, (tuple, list)):
+        return sum(frame_bytes(item) for item in value)
+    usage = value.memory_usage(index=True, deep=True)
+    return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+
+
+# Least-recently-used cache bounded by the total size of its values rather than their number. Each
+# value is stored with its size in bytes; adding one evicts the least recently used entries until
+# the total fits the budget again (the newest entry always stays, even if it alone is larger).
+# The entries are reported to tracing under `name`, for the metrics file and the debug panel.
+class ByteBudgetLRU:
+    def __init__(self, name, budget):
+        self.name = name
+        self.budget = budget
+        self.total = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        report_memory(name, self.sizes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Function to get a value (None if absent), marking it as the most recently used
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    # Function to add or replace a value, returning the keys evicted to make room for it
+    def put(self, key, value, size=None):
+        size = frame_bytes(value) if size is None else size
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total -= old[1]
+            self._entries[key] = (value, size)
+            self.total += size
+            while self.total > self.budget and len(self._entries) > 1:
+                stale, (_, stale_size) = self._entries.popitem(last=False)
+                self.total -= stale_size
+                evicted.append(stale)
+        return evicted
+
+    # Function to drop every entry whose key matches `predicate`
+    def discard(self, predicate):
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self.total -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total = 0
+
+    # Function to list (key, bytes) for every entry, most recently used first
+    def sizes(self):
+        with self._lock:
+            return [(key, size) for key, (_, size) in reversed(self._entries.items())]
@@ -0,0 +1,45 @@
+import pandas as pd
+
+# Cached bars plus columns derived from them. The bars stay the cache's read-only, zero-copy frame;
+# derived columns are kept next to it instead of being written into it, so reading from the cache
+# never copies and adding an indicator never mutates data that other reruns share.
+class FrameOverlay:
+    def __init__(self, base, derived=None):
+        self.base = base
+        self.derived = {} if derived is None else derived
+
+    @property
+    def index(self):
+        return self.base.index
+
+    def __len__(self):
+        return len(self.base)
+
+    # Columns by name (derived ones first), or rows by positional slice as with a DataFrame
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.take(key)
+        if key in self.derived:
+            return self.derived[key]
+        return self.base[key]
+
+    def __setitem__(self, column, values):
+        if column in self.base.columns:
+            raise KeyError(f'{column!r} is a cached column and cannot be overwritten')
+        if not isinstance(values, pd.Series):
+            values = pd.Series(values, index=self.index)
+        elif not values.index.equals(self.index):
+            values = values.reindex(self.index)
+        self.derived[column] = values
+
+    # Function to take rows by position, slicing the bars and the derived columns alike
+    def take(self, rows):
+        return FrameOverlay(self.base.iloc[rows], {column: values.iloc[rows] for column, values in self.derived.items()})
+
+    # Function to keep the rows dated `start` or later
+    def since(self, start):
+        return self.take(slice(self.index.searchsorted(pd.Timestamp(start)), None))
+
+    # Function to build an ordinary DataFrame of bars and derived columns (a copy), e.g. for display
+    def to_frame(self):
+        return pd.concat([self.base, pd.DataFrame(self.derived, index=self.index)], axis=1)
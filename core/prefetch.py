@@ -0,0 +1,27 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .data_cache import load_history, read_cached, recall, store_history
+from .providers import get_provider
+from .tracing import span
+
+# Worker threads used for per-ticker cache refreshes
+MAX_WORKERS = int(os.environ.get('PREFETCH_WORKERS', '8'))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='prefetch')
+
+# Function to load every ticker's history from `start` into the cache, blocking until done
+def prefetch(tickers, start=None):
+    stale = [ticker for ticker in tickers if recall(ticker, start) is None]
+    # Tickers never seen before share one batched download
+    cold = [ticker for ticker in stale if read_cached(ticker) is None]
+    if len(cold) > 1:
+        with span('download'):
+            downloaded = get_provider().download_many(cold, start=start)
+        for ticker, data in downloaded.items():
+            if not data.empty:
+                store_history(ticker, data, start)
+    # Head/tail refreshes start at a different date per ticker, so they run one per worker
+    futures = [_executor.submit(load_history, ticker, start) for ticker in stale if recall(ticker, start) is None]
+    for future in futures:
+        future.result()
@@ -0,0 +1,296 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+from .tracing import count
+
+# Upstream requests per second and burst size allowed by the token bucket in front of Yahoo Finance
+RATE_LIMIT = float(os.environ.get('MARKET_DATA_RATE', '2'))
+RATE_BURST = int(os.environ.get('MARKET_DATA_BURST', '5'))
+
+# Attempts per upstream request, and the delay (seconds) before the first retry; it doubles after each failure
+RETRY_ATTEMPTS = int(os.environ.get('MARKET_DATA_RETRIES', '3'))
+RETRY_BACKOFF = float(os.environ.get('MARKET_DATA_BACKOFF', '1'))
+
+# Calendar offsets for the yfinance-style period strings the apps use
+PERIOD_OFFSETS = {
+    'd': lambda n: pd.DateOffset(days=n),
+    'wk': lambda n: pd.DateOffset(weeks=n),
+    'mo': lambda n: pd.DateOffset(months=n),
+    'y': lambda n: pd.DateOffset(years=n),
+}
+
+# Function to flatten the (Price, Ticker) column MultiIndex yfinance returns for a single ticker
+def normalize_frame(data):
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy()
+        data.columns = data.columns.get_level_values(0)
+    data.index = pd.to_datetime(data.index)
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    data.index.name = 'Date'
+    return data
+
+# Function to build the empty frame returned for unknown tickers
+def empty_frame():
+    return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume'],
+                        index=pd.DatetimeIndex([], name='Date'), dtype=float)
+
+# Function to turn a period string such as '1y' or '6mo' into a date offset (None means the full history)
+def period_offset(period):
+    if period is None or period == 'max':
+        return None
+    for suffix, offset in PERIOD_OFFSETS.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return offset(int(period[:-len(suffix)]))
+    raise ValueError(f'Unsupported period: {period}')
+
+
+# Interface every app goes through for prices and fundamentals
+class MarketDataProvider:
+    # Daily OHLCV bars for one ticker; end is exclusive, like yf.download
+    def download(self, ticker, start=None, end=None, period=None):
+        raise NotImplementedError
+
+    # Raw fundamentals dictionary for one ticker, shaped like yf.Ticker(ticker).info
+    def info(self, ticker):
+        raise NotImplementedError
+
+    # Daily OHLCV bars for several tickers as {ticker: frame}; providers with a batch endpoint override this
+    def download_many(self, tickers, start=None, end=None):
+        return {ticker: self.download(ticker, start=start, end=end) for ticker in tickers}
+
+
+# Provider backed by Yahoo Finance
+class YFinanceProvider(MarketDataProvider):
+    def download(self, ticker, start=None, end=None, period=None):
+        import yfinance as yf
+        kwargs = {'start': start, 'end': end}
+        if period is not None:
+            kwargs = {'period': period}
+        return normalize_frame(yf.download(ticker, **kwargs))
+
+    def info(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).info
+
+    def download_many(self, tickers, start=None, end=None):
+        import yfinance as yf
+        raw = yf.download(list(tickers), start=start, end=end, group_by='ticker')
+        frames = {}
+        for ticker in tickers:
+            if ticker in raw.columns.get_level_values(0):
+                # Rows from other tickers' trading calendars come back all-NaN
+                frames[ticker] = normalize_frame(raw[ticker].dropna(how='all'))
+            else:
+                frames[ticker] = empty_frame()
+        return frames
+
+
+# Provider serving recorded bars (<TICKER>.parquet or .csv) and fundamentals (<TICKER>.info.json) from a directory
+class LocalProvider(MarketDataProvider):
+    def __init__(self, data_dir, latency=0.0):
+        self.data_dir = data_dir
+        self.latency = latency
+
+    def _path(self, ticker, suffix):
+        return os.path.join(self.data_dir, ticker.upper().replace('/', '_') + suffix)
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def download(self, ticker, start=None, end=None, period=None):
+        self._sleep()
+        parquet_path = self._path(ticker, '.parquet')
+        csv_path = self._path(ticker, '.csv')
+        if os.path.exists(parquet_path):
+            data = pd.read_parquet(parquet_path)
+        elif os.path.exists(csv_path):
+            data = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+        else:
+            # Unknown tickers come back empty, the same way yf.download reports them
+            return empty_frame()
+        data = normalize_frame(data)
+        offset = period_offset(period)
+        if offset is not None and not data.empty:
+            start = data.index[-1] - offset
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+        if end is not None:
+            data = data[data.index < pd.Timestamp(end)]
+        return data
+
+    def info(self, ticker):
+        self._sleep()
+        path = self._path(ticker, '.info.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path) as info_file:
+            return json.load(info_file)
+
+
+# Token bucket: holds up to `burst` tokens, refilled at `rate` per second; each request takes one
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Function to block until a token is available and take it
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Calls keyed by their arguments; a call made while an identical one is in flight waits for that
+# one's result (or exception) instead of starting another
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    # Function to join the calls in flight for several keys and lead the rest: returns the future of
+    # every key and the keys the caller now leads, each of which it must settle through finish()
+    def join(self, keys):
+        futures, led = {}, []
+        with self._lock:
+            for key in keys:
+                future = self._calls.get(key)
+                if future is None:
+                    future = self._calls[key] = Future()
+                    led.append(key)
+                else:
+                    count('upstream', 'shared')
+                futures[key] = future
+        return futures, led
+
+    # Function to settle a led call with its result or exception, ending its flight
+    def finish(self, key, result=None, error=None):
+        with self._lock:
+            future = self._calls[key]
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+        with self._lock:
+            del self._calls[key]
+
+    def do(self, key, fetch):
+        futures, led = self.join([key])
+        if led:
+            try:
+                self.finish(key, fetch())
+            except BaseException as error:
+                self.finish(key, error=error)
+        return futures[key].result()
+
+
+# Function to make a start/end argument hashable and comparable however the caller spelled the date
+def _date_key(value):
+    return None if value is None else pd.Timestamp(value)
+
+
+# Provider wrapper every upstream request goes through. Concurrent identical requests (same
+# method, ticker and range) share one in-flight call, so a burst of sessions opening the same
+# ticker costs one fetch; a batch download counts as one request per ticker for this. Requests
+# are paced by a token bucket (rate=None for no limit), and failures are retried with jittered
+# exponential backoff.
+class GuardedProvider(MarketDataProvider):
+    def __init__(self, provider, rate=RATE_LIMIT, burst=RATE_BURST, attempts=RETRY_ATTEMPTS, backoff=RETRY_BACKOFF):
+        self.provider = provider
+        self.attempts = attempts
+        self.backoff = backoff
+        self._bucket = None if rate is None else TokenBucket(rate, burst)
+        self._flights = SingleFlight()
+
+    # Function to run one upstream request through the rate limiter, retrying failures
+    def _attempt(self, fetch):
+        for attempt in range(self.attempts):
+            if self._bucket is not None:
+                self._bucket.acquire()
+            count('upstream', 'request')
+            try:
+                return fetch()
+            except Exception:
+                if attempt == self.attempts - 1:
+                    raise
+                count('upstream', 'retry')
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def _call(self, key, fetch):
+        return self._flights.do(key, lambda: self._attempt(fetch))
+
+    def download(self, ticker, start=None, end=None, period=None):
+        return self._call(self._download_key(ticker, start, end, period),
+                          lambda: self.provider.download(ticker, start=start, end=end, period=period))
+
+    @staticmethod
+    def _download_key(ticker, start, end, period=None):
+        return ('download', ticker.upper(), _date_key(start), _date_key(end), period)
+
+    def info(self, ticker):
+        return self._call(('info', ticker.upper()), lambda: self.provider.info(ticker))
+
+    # Tickers already being downloaded with the same range are waited for rather than fetched again,
+    # and single downloads started while the batch is in flight wait for its frames
+    def download_many(self, tickers, start=None, end=None):
+        keys = {ticker: self._download_key(ticker, start, end) for ticker in dict.fromkeys(tickers)}
+        futures, led = self._flights.join(keys.values())
+        batch = [ticker for ticker, key in keys.items() if key in led]
+        if batch:
+            try:
+                frames = self._attempt(lambda: self.provider.download_many(batch, start=start, end=end))
+            except BaseException as error:
+                for ticker in batch:
+                    self._flights.finish(keys[ticker], error=error)
+                raise
+            for ticker in batch:
+                self._flights.finish(keys[ticker], frames.get(ticker, empty_frame()))
+        return {ticker: futures[key].result() for ticker, key in keys.items()}
+
+
+# Function to record bars and fundamentals from one provider into a directory LocalProvider can replay
+def record_fixtures(provider, tickers, data_dir, start=None, end=None):
+    os.makedirs(data_dir, exist_ok=True)
+    local = LocalProvider(data_dir)
+    for ticker in tickers:
+        provider.download(ticker, start=start, end=end).to_parquet(local._path(ticker, '.parquet'))
+        with open(local._path(ticker, '.info.json'), 'w') as info_file:
+            json.dump(provider.info(ticker), info_file, default=str)
+
+
+_provider = None
+
+# Function to get the process-wide provider, chosen by MARKET_DATA_PROVIDER ('yfinance' or 'local');
+# either is guarded, but only Yahoo Finance is rate limited
+def get_provider():
+    global _provider
+    if _provider is None:
+        if os.environ.get('MARKET_DATA_PROVIDER', 'yfinance') == 'local':
+            _provider = GuardedProvider(LocalProvider(os.environ.get('MARKET_DATA_DIR', 'fixtures'),
+                                                      latency=float(os.environ.get('MARKET_DATA_LATENCY', '0'))),
+                                        rate=None)
+        else:
+            _provider = GuardedProvider(YFinanceProvider())
+    return _provider
+
+# Function to swap the process-wide provider, e.g. for benchmarks
+def set_provider(provider):
+    global _provider
+    _provider = provider
@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from . import fundamentals
+from .data_cache import covers, data_as_of, read_meta, refresh_history
+from .prefetch import prefetch
+
+logger = logging.getLogger(__name__)
+
+# Daily stock bars are final once the US session has closed
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_CLOSE_HOUR, MARKET_CLOSE_MINUTE = 16, 15
+
+# Seconds between refreshes of symbols that trade around the clock, like EURUSD=X
+FOREX_INTERVAL = float(os.environ.get('FOREX_REFRESH_SECONDS', '900'))
+
+# Seconds the worker sleeps between checks for due refreshes
+POLL_SECONDS = float(os.environ.get('SCHEDULER_POLL_SECONDS', '30'))
+
+# Seconds a ticker stays watched after the last rerun that asked for it (default one week)
+WATCH_TTL = float(os.environ.get('SCHEDULER_WATCH_TTL', str(7 * 24 * 3600)))
+
+# Function to tell forex pairs apart from exchange-traded symbols
+def is_forex(ticker):
+    return ticker.upper().endswith('=X')
+
+# Function to get the first weekday market close strictly after a moment
+def next_market_close(after):
+    local = after.astimezone(MARKET_TZ)
+    close = local.replace(hour=MARKET_CLOSE_HOUR, minute=MARKET_CLOSE_MINUTE, second=0, microsecond=0)
+    if close <= local:
+        close += timedelta(days=1)
+    while close.weekday() >= 5:
+        close += timedelta(days=1)
+    return close
+
+# Function to get when a ticker refreshed at `refreshed_at` (epoch seconds, None if never) is next due
+def next_due(ticker, refreshed_at):
+    if refreshed_at is None:
+        return 0.0
+    if is_forex(ticker):
+        return refreshed_at + FOREX_INTERVAL
+    return next_market_close(datetime.fromtimestamp(refreshed_at, MARKET_TZ)).timestamp()
+
+
+# Background worker that keeps cached bars and fundamentals fresh, so reruns only read the cache
+class RefreshScheduler:
+    def __init__(self, max_workers=4):
+        self._bars = {}
+        self._fundamentals = set()
+        self._watched_at = {}
+        self._running = set()
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='refresh')
+        self._thread = threading.Thread(target=self._loop, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+
+    # Keep a ticker's bars from `start` on (None for all history) and optionally its fundamentals
+    # fresh, until no rerun has asked for it for WATCH_TTL seconds
+    def watch(self, ticker, start=None, with_fundamentals=False):
+        ticker = ticker.upper()
+        start = None if start is None else pd.Timestamp(start).normalize()
+        with self._lock:
+            self._watched_at[ticker] = time.time()
+            if ticker not in self._bars or not covers(self._bars[ticker], start):
+                self._bars[ticker] = start
+                self._wake.set()
+            if with_fundamentals and ticker not in self._fundamentals:
+                self._fundamentals.add(ticker)
+                self._wake.set()
+
+    # Stop the worker and wait for the refreshes in flight to finish
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _loop(self):
+        while True:
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self._run_due()
+            except Exception:
+                logger.warning('Scheduled refresh pass failed', exc_info=True)
+
+    # Stop refreshing tickers no rerun has asked for within WATCH_TTL; their cache files stay on disk
+    def _expire(self, now):
+        with self._lock:
+            for ticker in [ticker for ticker, watched_at in self._watched_at.items() if now - watched_at > WATCH_TTL]:
+                del self._watched_at[ticker]
+                self._bars.pop(ticker, None)
+                self._fundamentals.discard(ticker)
+                self._attempts.pop(ticker, None)
+
+    def _run_due(self):
+        now = time.time()
+        self._expire(now)
+        with self._lock:
+            bars = dict(self._bars)
+            watched_fundamentals = list(self._fundamentals)
+        cold = {}
+        for ticker, start in bars.items():
+            coverage, refreshed_at = read_meta(ticker)
+            # A symbol that has never loaded is retried on its normal schedule, not on every pass
+            last_try = refreshed_at if refreshed_at is not None else self._attempts.get(ticker)
+            if not (now >= next_due(ticker, last_try) or not covers(coverage, start)) or not self._claim(ticker):
+                continue
+            if refreshed_at is None:
+                cold.setdefault(start, []).append(ticker)
+            else:
+                self._executor.submit(self._refresh_bars, [ticker], start)
+        # Tickers never cached before go through the prefetcher, which batches their downloads
+        for start, tickers in cold.items():
+            self._executor.submit(self._refresh_bars, tickers, start)
+        for ticker in watched_fundamentals:
+            entry = fundamentals.cached_entry(ticker)
+            refreshed_at = None if entry is None else entry['fetched_at']
+            if now >= next_due(ticker, refreshed_at):
+                fundamentals.schedule_refresh(ticker)
+
+    def _claim(self, ticker):
+        with self._lock:
+            if ticker in self._running:
+                return False
+            self._running.add(ticker)
+            return True
+
+    def _refresh_bars(self, tickers, start):
+        try:
+            if len(tickers) == 1:
+                refresh_history(tickers[0], start)
+            else:
+                prefetch(tickers, start)
+        except Exception:
+            logger.warning('Scheduled refresh of %s failed', ', '.join(tickers), exc_info=True)
+        finally:
+            with self._lock:
+                self._running.difference_update(tickers)
+                # A ticker that expired while it was refreshing is not tracked again
+                self._attempts.update(dict.fromkeys([ticker for ticker in tickers if ticker in self._bars], time.time()))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+# Function to get the process-wide scheduler, starting its worker on first use
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler()
+        return _scheduler
+
+# Function to register tickers with the scheduler
+def watch(tickers, start=None, with_fundamentals=False):
+    scheduler = get_scheduler()
+    for ticker in tickers:
+        scheduler.watch(ticker, start, with_fundamentals)
+
+# Function to format the oldest refresh time among tickers for a "data as of" caption
+def as_of_caption(tickers):
+    stamps = [stamp for stamp in (data_as_of(ticker) for ticker in tickers) if stamp is not None]
+    if not stamps:
+        return 'Data as of: not yet refreshed'
+    return f'Data as of {min(stamps):%Y-%m-%d %H:%M}'
@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from . import indicators
+from .data_cache import cached_history
+from .tracing import span
+
+# Indicator screener over many cached tickers. Tickers are split into batches, each batch's closes
+# are stacked into one (tickers x bars) matrix and run through the batched indicator engine, and
+# the batches are spread over a pool of worker processes. The rules use the dashboards' indicators
+# with their default settings.
+
+# Bars per ticker the indicators run over; enough for EMA_200 to settle, as on the dashboards
+SCREEN_BARS = int(os.environ.get('SCREENER_BARS', '600'))
+
+# Fewest cached bars a ticker is screened with, the longest indicator window (EMA_200); tickers
+# with fewer are listed as having insufficient history and match no rule
+MIN_BARS = int(os.environ.get('SCREENER_MIN_BARS', '200'))
+
+# Tickers per batch handed to a worker process
+BATCH_SIZE = int(os.environ.get('SCREENER_BATCH', '100'))
+
+# Worker processes; universes of a single batch are screened in this process instead
+MAX_WORKERS = int(os.environ.get('SCREENER_WORKERS', str(os.cpu_count() or 1)))
+
+# Moving average window and band width of the envelope rules, as mae.py draws them
+ENVELOPE_WINDOW = 20
+ENVELOPE_PCT = 5.0
+
+# Function to test, per ticker, whether `a` crossed above `b` within the last `lookback` bars
+def crossed_above(a, b, lookback):
+    above = a > b
+    crossed = above[:, 1:] & ~above[:, :-1]
+    return crossed[:, -lookback:].any(axis=1)
+
+# Rules by name, each a test over the indicator matrices `m` giving one boolean per ticker;
+# crossover rules fire if the cross happened within the last `lookback` bars
+RULES = {
+    'EMA 20 crossed above EMA 50': lambda m, lookback: crossed_above(m['EMA 20'], m['EMA 50'], lookback),
+    'EMA 20 crossed below EMA 50': lambda m, lookback: crossed_above(m['EMA 50'], m['EMA 20'], lookback),
+    'EMA 50 crossed above EMA 200': lambda m, lookback: crossed_above(m['EMA 50'], m['EMA 200'], lookback),
+    'EMA 50 crossed below EMA 200': lambda m, lookback: crossed_above(m['EMA 200'], m['EMA 50'], lookback),
+    'Close above EMA 200': lambda m, lookback: m['Close'][:, -1] > m['EMA 200'][:, -1],
+    'RSI below 30': lambda m, lookback: m['RSI'][:, -1] < 30,
+    'RSI above 70': lambda m, lookback: m['RSI'][:, -1] > 70,
+    'MACD crossed above signal': lambda m, lookback: crossed_above(m['MACD'], m['Signal Line'], lookback),
+    'MACD crossed below signal': lambda m, lookback: crossed_above(m['Signal Line'], m['MACD'], lookback),
+    'Close at or below lower Bollinger Band': lambda m, lookback: m['Close'][:, -1] <= m['Lower Band'][:, -1],
+    'Close at or above upper Bollinger Band': lambda m, lookback: m['Close'][:, -1] >= m['Upper Band'][:, -1],
+    'Close above upper envelope': lambda m, lookback: m['Close'][:, -1] > m['Upper Envelope'][:, -1],
+    'Close below lower envelope': lambda m, lookback: m['Close'][:, -1] < m['Lower Envelope'][:, -1],
+}
+
+# Function to get a ticker's last SCREEN_BARS cached closes, however far back its cache reaches,
+# without contacting the provider (empty if it has none)
+def cached_closes(ticker):
+    data = cached_history(ticker)
+    if data is None or data.empty:
+        return pd.Series(dtype=float)
+    return data['Close'].iloc[-SCREEN_BARS:]
+
+# Function to screen one batch: the number of bars, the latest indicator values and a column per
+# rule, one row per ticker. Runs in a worker process.
+def screen_batch(tickers, rules, lookback):
+    closes = {ticker: cached_closes(ticker) for ticker in tickers}
+    columns = ['Date', 'Bars', 'Close', 'EMA 20', 'EMA 50', 'EMA 200', 'RSI', 'MACD', 'Signal Line',
+               'Lower Band', 'Upper Band', 'Lower Envelope', 'Upper Envelope'] + list(rules)
+    if not closes:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='Ticker'))
+
+    # Each ticker's bars end in the last column; shorter histories are NaN-padded on the left
+    prices = np.full((len(closes), SCREEN_BARS), np.nan)
+    for row, series in enumerate(closes.values()):
+        prices[row, SCREEN_BARS - len(series):] = series.to_numpy(dtype=float)
+
+    ema_20, ema_50, ema_200 = indicators.ema(prices, [20, 50, 200])
+    macd_line, signal_line = indicators.macd(prices)
+    _, upper_band, lower_band = indicators.bollinger(prices, 20, 2)
+    _, upper_envelope, lower_envelope = indicators.envelope(prices, ENVELOPE_WINDOW, ENVELOPE_PCT)
+    m = {
+        'Close': prices,
+        'EMA 20': ema_20,
+        'EMA 50': ema_50,
+        'EMA 200': ema_200,
+        'RSI': indicators.rsi(prices, 14)[0],
+        'MACD': macd_line,
+        'Signal Line': signal_line,
+        'Lower Band': lower_band[0, 0],
+        'Upper Band': upper_band[0, 0],
+        'Lower Envelope': lower_envelope[0, 0],
+        'Upper Envelope': upper_envelope[0, 0],
+    }
+
+    table = pd.DataFrame({name: values[:, -1] for name, values in m.items()},
+                         index=pd.Index(list(closes), name='Ticker'))
+    table.insert(0, 'Date', [series.index[-1] if len(series) else pd.NaT for series in closes.values()])
+    table.insert(1, 'Bars', [len(series) for series in closes.values()])
+    sufficient = table['Bars'].to_numpy() >= MIN_BARS
+    for rule in rules:
+        table[rule] = RULES[rule](m, lookback) & sufficient
+    return table[columns]
+
+
+_pool = None
+
+# Function to get the process-wide worker pool; workers are spawned rather than forked, since the
+# server process runs threads, and are kept for later screens
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+# Function to screen tickers against rules (names from RULES). Returns one row per ticker: its
+# number of cached bars, the latest indicator values, a True/False column per rule and the number
+# of rules matched, best matches first; with match='all' or 'any' only the matching tickers are
+# kept, along with those that have fewer than MIN_BARS bars, so they can be reported.
+def screen(tickers, rules, lookback=5, match=None):
+    unknown = [rule for rule in rules if rule not in RULES]
+    if unknown:
+        raise ValueError(f'Unknown screener rules: {unknown}')
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    batches = [tickers[start:start + BATCH_SIZE] for start in range(0, len(tickers), BATCH_SIZE)]
+    with span('screen'):
+        if len(batches) <= 1 or MAX_WORKERS <= 1:
+            tables = [screen_batch(batch, rules, lookback) for batch in batches]
+        else:
+            tables = list(get_pool().map(screen_batch, batches, repeat(rules), repeat(lookback)))
+    non_empty = [table for table in tables if len(table)]
+    table = pd.concat(non_empty) if non_empty else screen_batch([], rules, lookback)
+    table['Matches'] = table[list(rules)].sum(axis=1).astype(int)
+    short = table['Bars'] < MIN_BARS
+    if match == 'all':
+        table = table[short | (table['Matches'] == len(rules))]
+    elif match == 'any':
+        table = table[short | (table['Matches'] > 0)]
+    return table.sort_values(['Matches', 'RSI'], ascending=[False, True])
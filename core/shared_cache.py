@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+
+import pyarrow as pa
+
+from .memory import ByteBudgetLRU, frame_bytes
+from .tracing import report_memory
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, writers are assumed not to race
+    fcntl = None
+
+# Directory of memory-mapped Arrow files shared by every server process on the node; keep it on local disk
+SHARED_DIR = os.environ.get('SHARED_CACHE_DIR', os.path.join('.cache', 'shared'))
+
+# Bytes of published files kept node-wide; past it the least recently published tickers are dropped
+# (a watched ticker is republished on every background refresh, so it stays)
+SHARED_BYTES = int(os.environ.get('SHARED_CACHE_BYTES', str(1024 * 2 ** 20)))
+
+# Bytes of mapped frames each process holds on to; past it the least recently used are unmapped
+MAPPED_BYTES = int(os.environ.get('SHARED_CACHE_MAPPED_BYTES', str(256 * 2 ** 20)))
+
+
+# Store of DataFrames as uncompressed Arrow IPC files that every process maps read-only, so a
+# ticker's bars sit in the page cache once per node instead of once per worker. A small JSON
+# index maps each key to its current file and metadata; writers publish a new file and swap
+# the index entry atomically, and readers keep their old mapping valid until they remap.
+class SharedFrameStore:
+    def __init__(self, directory=SHARED_DIR, budget=SHARED_BYTES, mapped_budget=MAPPED_BYTES):
+        self.directory = directory
+        self.budget = budget
+        self._index = {}
+        self._index_stamp = None
+        self._maps = ByteBudgetLRU('bars', mapped_budget)
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # Function to re-read the index only when another process has replaced it
+    def _read_index(self):
+        path = self._path('index.json')
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return {}
+        stamp = (stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            if stamp == self._index_stamp:
+                return self._index
+        with open(path) as index_file:
+            index = json.load(index_file)
+        with self._lock:
+            self._index, self._index_stamp = index, stamp
+        return index
+
+    def _write_index(self, index):
+        tmp_path = self._path(f'index.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as index_file:
+            json.dump(index, index_file)
+        os.replace(tmp_path, self._path('index.json'))
+
+    # Run `update(index)` under an exclusive cross-process lock and publish the result
+    def _update_index(self, update):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path('index.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                path = self._path('index.json')
+                index = {}
+                if os.path.exists(path):
+                    with open(path) as index_file:
+                        index = json.load(index_file)
+                result = update(index)
+                self._write_index(index)
+                return result
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _map(self, name):
+        source = pa.memory_map(self._path(name), 'r')
+        table = pa.ipc.open_file(source).read_all()
+        # One block per column keeps numeric columns as zero-copy views of the mapping
+        return table.to_pandas(split_blocks=True)
+
+    # Function to get (frame, metadata) for a key, or None if nothing is published
+    def lookup(self, key):
+        entry = self._read_index().get(key)
+        if entry is None:
+            return None
+        mapped = self._maps.get(key)
+        if mapped is not None and mapped[0] == entry['file']:
+            return mapped[1], entry['meta']
+        try:
+            frame = self._map(entry['file'])
+        except FileNotFoundError:
+            # A writer replaced the file between our index read and the open; the next lookup sees the new one
+            return None
+        self._maps.put(key, (entry['file'], frame), frame_bytes(frame))
+        return frame, entry['meta']
+
+    # Function to publish a new frame (or, with frame=None, only new metadata) for a key
+    def publish(self, key, meta, frame=None):
+        name = size = None
+        if frame is not None:
+            name = f'{key.replace("/", "_")}.{time.time_ns()}.{os.getpid()}.arrow'
+            table = pa.Table.from_pandas(frame, preserve_index=True)
+            tmp_path = self._path(name + '.tmp')
+            os.makedirs(self.directory, exist_ok=True)
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, self._path(name))
+            size = os.path.getsize(self._path(name))
+
+        def update(index):
+            old = index.get(key)
+            if name is None and old is None:
+                return []
+            index[key] = {'file': name or old['file'], 'meta': meta, 'bytes': size or old.get('bytes', 0),
+                          'published_at': time.time()}
+            removed = [old['file']] if old is not None and name is not None else []
+            # Evict the least recently published tickers until the files fit the budget again
+            total = sum(entry.get('bytes', 0) for entry in index.values())
+            for stale in sorted(index, key=lambda other: index[other].get('published_at', 0)):
+                if total <= self.budget:
+                    break
+                if stale != key:
+                    total -= index[stale].get('bytes', 0)
+                    removed.append(index.pop(stale)['file'])
+            return removed
+
+        for stale_file in self._update_index(update):
+            # Processes still mapping the old file keep a valid view; the space is freed when they let go
+            try:
+                os.remove(self._path(stale_file))
+            except OSError:
+                pass
+
+    # Function to list (key, bytes) of every published file, most recently published first
+    def sizes(self):
+        index = self._read_index()
+        order = sorted(index, key=lambda key: index[key].get('published_at', 0), reverse=True)
+        return [(key, index[key].get('bytes', 0)) for key in order]
+
+
+_store = None
+
+# Function to get the process-wide shared store
+def get_store():
+    global _store
+    if _store is None:
+        _store = SharedFrameStore()
+        report_memory('bars.shared', _store.sizes)
+    return _store
@@ -0,0 +1,197 @@
+import copy
+import json
+import math
+from collections import deque
+
+import pandas as pd
+
+# Incremental indicator states. Each update() consumes one close in O(1) and returns the
+# indicator value(s) for that bar, matching the pandas formulas used by the apps.
+
+NAN = float('nan')
+
+
+# EMA with the recursive adjust=False update, like Series.ewm(span=span, adjust=False).mean().
+# `weight` is the current value's weight relative to the next close's; across NaN closes it keeps
+# decaying, as pandas does with ignore_na=False (and indicators.ema)
+class EMAState:
+    def __init__(self, span, value=None, weight=1.0):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+        self.weight = weight
+
+    def update(self, price):
+        if self.value is not None:
+            self.weight *= 1.0 - self.alpha
+        if not math.isnan(price):
+            if self.value is not None:
+                self.value = (self.weight * self.value + self.alpha * price) / (self.weight + self.alpha)
+            else:
+                self.value = price
+            self.weight = 1.0
+        return NAN if self.value is None else self.value
+
+    def to_dict(self):
+        return {'span': self.span, 'value': self.value, 'weight': self.weight}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['span'], state['value'], state.get('weight', 1.0))
+
+
+# MACD and signal line carried as three chained EMA states, like add_macd
+class MACDState:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+
+    def update(self, price):
+        macd = self.fast.update(price) - self.slow.update(price)
+        return macd, self.signal.update(macd)
+
+    def to_dict(self):
+        return {'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(), 'signal': self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        macd = cls()
+        macd.fast = EMAState.from_dict(state['fast'])
+        macd.slow = EMAState.from_dict(state['slow'])
+        macd.signal = EMAState.from_dict(state['signal'])
+        return macd
+
+
+# RSI from running sums of the last `window` gains and losses, like add_rsi
+class RSIState:
+    def __init__(self, window=14, min_periods=None, prev_close=None, gains=(), losses=()):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.prev_close = prev_close
+        self.gains = deque(gains, maxlen=window)
+        self.losses = deque(losses, maxlen=window)
+        self.gain_sum = sum(gains)
+        self.loss_sum = sum(losses)
+
+    def update(self, price):
+        # The first delta is NaN, which add_rsi counts as a zero gain and zero loss
+        delta = NAN if self.prev_close is None else price - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if len(self.gains) == self.window:
+            self.gain_sum -= self.gains[0]
+            self.loss_sum -= self.losses[0]
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.gain_sum += gain
+        self.loss_sum += loss
+        self.prev_close = price
+        if len(self.gains) < self.min_periods:
+            return NAN
+        # Clamp tiny negative drift left over from subtracting old values
+        gain_sum = max(self.gain_sum, 0.0)
+        loss_sum = max(self.loss_sum, 0.0)
+        if loss_sum == 0:
+            return NAN if gain_sum == 0 else 100.0
+        return 100 - (100 / (1 + gain_sum / loss_sum))
+
+    def to_dict(self):
+        return {'window': self.window, 'min_periods': self.min_periods, 'prev_close': self.prev_close,
+                'gains': list(self.gains), 'losses': list(self.losses)}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['window'], state['min_periods'], state['prev_close'], state['gains'], state['losses'])
+
+
+# Bollinger Bands over a rolling window, with Welford-style add/remove updates of mean and variance.
+# NaN closes take up a place in the window but are left out of the statistics, as in pandas rolling.
+class BollingerState:
+    def __init__(self, window=20, num_std_dev=2, min_periods=1, values=()):
+        self.window = window
+        self.num_std_dev = num_std_dev
+        self.min_periods = min_periods
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        for value in values:
+            self._add(value)
+
+    def _add(self, value):
+        self.values.append(value)
+        if math.isnan(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def _remove(self, value):
+        if math.isnan(value):
+            return
+        self.count -= 1
+        if self.count == 0:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (value - self.mean)
+
+    def update(self, price):
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self._add(price)
+        count = self.count
+        if count < max(self.min_periods, 1):
+            return NAN, NAN, NAN
+        std = math.sqrt(max(self.m2, 0.0) / (count - 1)) if count > 1 else NAN
+        band = self.num_std_dev * std
+        return self.mean, self.mean + band, self.mean - band
+
+    def to_dict(self):
+        return {'window': self.window, 'num_std_dev': self.num_std_dev,
+                'min_periods': self.min_periods, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state['window'], state['num_std_dev'], state['min_periods'], state['values'])
+
+
+STATE_TYPES = {cls.__name__: cls for cls in (EMAState, MACDState, RSIState, BollingerState)}
+
+# Function to compute what a state would return for a bar without committing it (e.g. a still-forming intraday bar)
+def peek(state, price):
+    return copy.deepcopy(state).update(price)
+
+# Function to serialize a {column spec: state} mapping to JSON, with the bar it was committed
+# through and that bar's close, which tells whether later bars still build on the same prices
+def dump_states(states, as_of, close=None):
+    return json.dumps({'as_of': str(as_of), 'close': close,
+                       'states': {name: [type(state).__name__, state.to_dict()] for name, state in states.items()}})
+
+# Function to restore a {column spec: state} mapping, the bar it was committed through and that
+# bar's close (None if not recorded)
+def load_states(payload):
+    stored = json.loads(payload)
+    states = {name: STATE_TYPES[kind].from_dict(state) for name, (kind, state) in stored['states'].items()}
+    return states, pd.Timestamp(stored['as_of']), stored.get('close')
+
+# Function to turn one bar's state outputs into {column name: value}
+def _row(states, outputs):
+    row = {}
+    for name, value in zip(states, outputs):
+        if isinstance(value, tuple):
+            row.update(zip(name.split('|'), value))
+        else:
+            row[name] = value
+    return row
+
+# Function to advance states over new closes, returning one row of indicator values per bar.
+# The final bar is only peeked at, so a partial bar can be replaced on the next refresh.
+def advance(states, closes):
+    rows = [_row(states, [state.update(price) for state in states.values()]) for price in closes.iloc[:-1]]
+    if len(closes):
+        rows.append(_row(states, [peek(state, closes.iloc[-1]) for state in states.values()]))
+    return pd.DataFrame(rows, index=closes.index)
@@ -0,0 +1,145 @@
+import bisect
+import csv
+import logging
+import os
+import re
+import sys
+
+from .data_cache import cache_path, is_missing
+
+logger = logging.getLogger(__name__)
+
+# Listing of known symbols, a CSV with Symbol and Name columns; `python -m core.symbols` builds it
+# from Nasdaq's list of every US-traded security. Without it, tickers are not checked against a
+# listing (only their spelling, and the negative cache of tickers that came back empty).
+LISTING_FILE = os.environ.get('SYMBOL_LISTING', os.path.join('.cache', 'symbols.csv'))
+LISTING_URL = 'https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqtraded.txt'
+
+# Suggestions offered for a ticker that is not in the listing
+MAX_SUGGESTIONS = 8
+
+# Characters Yahoo Finance symbols are made of, e.g. BRK-B, EURUSD=X, ^GSPC, 7203.T
+SYMBOL_PATTERN = re.compile(r'[A-Z0-9^][A-Z0-9.\-=^]{0,19}')
+
+
+# Sorted array of symbols with their names; membership and prefix completion are binary searches
+class SymbolIndex:
+    def __init__(self, names):
+        self.names = names
+        self.symbols = sorted(names)
+
+    def __contains__(self, symbol):
+        position = bisect.bisect_left(self.symbols, symbol)
+        return position < len(self.symbols) and self.symbols[position] == symbol
+
+    def __len__(self):
+        return len(self.symbols)
+
+    # Function to list up to `limit` symbols starting with `prefix`, shortest first
+    def complete(self, prefix, limit=MAX_SUGGESTIONS):
+        start = bisect.bisect_left(self.symbols, prefix)
+        matches = []
+        for symbol in self.symbols[start:]:
+            if not symbol.startswith(prefix):
+                break
+            matches.append(symbol)
+        return sorted(matches, key=len)[:limit]
+
+    # Function to suggest symbols for a ticker that is not listed: those sharing its longest listed prefix
+    def suggest(self, ticker, limit=MAX_SUGGESTIONS):
+        for length in range(len(ticker), 0, -1):
+            matches = self.complete(ticker[:length], limit)
+            if matches:
+                return matches
+        return []
+
+
+_index = None
+_index_stamp = None
+_listing_missing_logged = False
+
+# Function to get the index of the listing file, re-read when the file changes (None if there is none)
+def get_index():
+    global _index, _index_stamp, _listing_missing_logged
+    try:
+        stat = os.stat(LISTING_FILE)
+    except FileNotFoundError:
+        if not _listing_missing_logged:
+            logger.warning('No symbol listing at %s: tickers are not checked against a listing or completed '
+                           'while typed. Build it with `python -m core.symbols`.', LISTING_FILE)
+            _listing_missing_logged = True
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if stamp != _index_stamp:
+        with open(LISTING_FILE, newline='') as listing:
+            _index = SymbolIndex({row['Symbol']: row['Name'] for row in csv.DictReader(listing)})
+        _index_stamp = stamp
+    return _index
+
+# Function to check a typed ticker before anything is fetched, as (ticker, problem, suggestions):
+# the normalized ticker, None or a message saying why it is rejected, and symbols to offer instead
+def check_ticker(text, known=()):
+    ticker = text.strip().upper()
+    if not ticker:
+        return ticker, 'Enter a ticker symbol.', []
+    if not SYMBOL_PATTERN.fullmatch(ticker):
+        return ticker, f'{ticker!r} is not a valid ticker symbol.', []
+    if is_missing(ticker):
+        return ticker, f'No data was found for {ticker} recently.', []
+    index = get_index()
+    # Symbols the listing does not carry (forex pairs, indices, foreign listings) pass if already cached
+    if index is None or ticker in index or ticker in known or os.path.exists(cache_path(ticker)):
+        return ticker, None, []
+    return ticker, f'{ticker} is not a listed symbol.', index.suggest(ticker)
+
+# Function to put a suggested ticker into the text box it was suggested for
+def _pick(key, ticker):
+    import streamlit as st
+    st.session_state[key] = ticker
+
+# Function to show a ticker box that completes listed symbols as they are typed, rejects unknown
+# tickers before any download and offers listed symbols with the same prefix instead; returns the
+# upper-case ticker, or None if rejected. Without a listing it is a plain text box.
+def ticker_input(label, value, known=(), key=None):
+    import streamlit as st
+    key = key or f'ticker:{label}'
+    # The default goes through session state, which the suggestion buttons also write to
+    st.session_state.setdefault(key, value)
+    index = get_index()
+    if index is None:
+        text = st.text_input(label, key=key)
+    else:
+        # Symbols outside the listing (forex pairs, indices) can still be typed in as new options
+        options = sorted(set(index.symbols).union(known)) if known else index.symbols
+        text = st.selectbox(label, options, key=key, accept_new_options=True, filter_mode='prefix')
+    ticker, problem, suggestions = check_ticker(text or '', known)
+    if problem is None:
+        return ticker
+    st.error(problem)
+    if suggestions:
+        st.caption('Did you mean:')
+        for column, suggestion in zip(st.columns(len(suggestions)), suggestions):
+            column.button(suggestion, key=f'{key}:{suggestion}', on_click=_pick, args=(key, suggestion),
+                          help=get_index().names.get(suggestion))
+    return None
+
+# Function to download Nasdaq's list of US-traded securities into a listing file, skipping test issues
+def build_listing(path=LISTING_FILE, url=LISTING_URL):
+    from urllib.request import urlopen
+    with urlopen(url) as response:
+        lines = response.read().decode('utf-8').splitlines()
+    # The last line is a 'File Creation Time' trailer, not a security
+    rows = csv.DictReader(lines[:-1], delimiter='|')
+    listed = {row['Symbol'].replace('.', '-'): row['Security Name']
+              for row in rows if row['Test Issue'] != 'Y' and row['Symbol']}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', newline='') as listing:
+        writer = csv.writer(listing)
+        writer.writerow(['Symbol', 'Name'])
+        writer.writerows(sorted(listed.items()))
+    os.replace(tmp_path, path)
+    return len(listed)
+
+if __name__ == '__main__':
+    print(f'{build_listing(*sys.argv[1:2])} symbols written')
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus text file the metrics are written to, one per server process (e.g. for node_exporter's
+# textfile collector); every series carries a pid label so the files can be collected side by side
+METRICS_FILE = os.environ.get('METRICS_FILE', os.path.join('.cache', 'metrics', f'dashboard_{os.getpid()}.prom'))
+
+# Seconds between metrics file writes; they happen at the end of a rerun, never in the middle of one
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '10'))
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Entries shown per cache in the debug panel's memory table, largest first
+DEBUG_MEMORY_ROWS = 10
+
+_histograms = {}
+_counters = {}
+_memory = {}
+_lock = threading.Lock()
+_last_flush = 0.0
+
+# Spans of the rerun running on this thread; work on background threads only feeds the metrics
+_local = threading.local()
+
+# Function to start collecting the spans of a script's rerun
+def start_rerun(script):
+    _local.script = script
+    _local.spans = []
+    _local.counts = {}
+    _local.stage = None
+    _local.depth = 0
+    _local.started = time.perf_counter()
+
+# Function to add one duration to a stage's histogram
+def observe(stage, seconds):
+    key = (getattr(_local, 'script', 'background'), stage)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+        for number, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram['buckets'][number] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+# Function to time a step of the hot path, e.g. `with span('download'):`
+@contextmanager
+def span(stage):
+    spans = getattr(_local, 'spans', None)
+    depth = getattr(_local, 'depth', 0)
+    record = [stage, depth, None]
+    if spans is not None:
+        spans.append(record)
+        _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record[2] = time.perf_counter() - start
+        if spans is not None:
+            _local.depth = depth
+        observe(stage, record[2])
+
+# Function to end the rerun's current top-level stage, if any
+def _close_stage():
+    record = getattr(_local, 'stage', None)
+    if record is not None:
+        record[2] = time.perf_counter() - _local.stage_started
+        observe(record[0], record[2])
+        _local.stage = None
+        _local.depth = 0
+
+# Function to mark where the next stage of a script starts, e.g. stage('figure'); it ends the
+# previous one, so a script reads top to bottom without wrapping its sections in blocks
+def stage(name):
+    _close_stage()
+    spans = getattr(_local, 'spans', None)
+    if spans is None:
+        return
+    _local.stage = [name, 0, None]
+    _local.stage_started = time.perf_counter()
+    spans.append(_local.stage)
+    _local.depth = 1
+
+# Function to count a cache lookup outcome, e.g. count('bars', 'hit')
+def count(cache, result):
+    key = (cache, result)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + 1
+    rerun_counts = getattr(_local, 'counts', None)
+    if rerun_counts is not None:
+        rerun_counts[key] = rerun_counts.get(key, 0) + 1
+
+# Function to register a cache's memory use: `sizes()` returns [(key, bytes)] for its entries
+def report_memory(cache, sizes):
+    with _lock:
+        _memory[cache] = sizes
+
+# Function to get {cache: [(key, bytes)]} for every registered cache
+def memory_report():
+    with _lock:
+        reporters = dict(_memory)
+    return {cache: sizes() for cache, sizes in reporters.items()}
+
+# Function to render all metrics in the Prometheus text exposition format
+def prometheus_text():
+    pid = os.getpid()
+    lines = ['# HELP dashboard_stage_seconds Time spent in each hot-path stage of a dashboard rerun.',
+             '# TYPE dashboard_stage_seconds histogram']
+    with _lock:
+        histograms = {key: dict(value, buckets=list(value['buckets'])) for key, value in _histograms.items()}
+        counters = dict(_counters)
+    for (script, stage), histogram in sorted(histograms.items()):
+        labels = f'pid="{pid}",script="{script}",stage="{stage}"'
+        for bound, total in zip(BUCKETS, histogram['buckets']):
+            lines.append(f'dashboard_stage_seconds_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f'dashboard_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+        lines.append(f'dashboard_stage_seconds_sum{{{labels}}} {histogram["sum"]}')
+        lines.append(f'dashboard_stage_seconds_count{{{labels}}} {histogram["count"]}')
+    lines += ['# HELP dashboard_cache_requests_total Cache lookups by cache and outcome.',
+              '# TYPE dashboard_cache_requests_total counter']
+    for (cache, result), total in sorted(counters.items()):
+        lines.append(f'dashboard_cache_requests_total{{pid="{pid}",cache="{cache}",result="{result}"}} {total}')
+    # Totals only: one series per cached ticker would grow with every symbol users look up
+    memory = memory_report()
+    lines += ['# HELP dashboard_cache_bytes Bytes held by each in-process cache.',
+              '# TYPE dashboard_cache_bytes gauge']
+    for cache, sizes in sorted(memory.items()):
+        lines.append(f'dashboard_cache_bytes{{pid="{pid}",cache="{cache}"}} {sum(size for _, size in sizes)}')
+    lines += ['# HELP dashboard_cache_entries Entries held by each in-process cache.',
+              '# TYPE dashboard_cache_entries gauge']
+    for cache, sizes in sorted(memory.items()):
+        lines.append(f'dashboard_cache_entries{{pid="{pid}",cache="{cache}"}} {len(sizes)}')
+    return '\n'.join(lines) + '\n'
+
+# Function to write the metrics file if the last write is older than METRICS_FLUSH_SECONDS (or always, with force)
+def flush_metrics(force=False):
+    global _last_flush
+    now = time.time()
+    with _lock:
+        if not force and now - _last_flush < METRICS_FLUSH_SECONDS:
+            return
+        _last_flush = now
+    os.makedirs(os.path.dirname(METRICS_FILE) or '.', exist_ok=True)
+    tmp_path = f'{METRICS_FILE}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as metrics_file:
+        metrics_file.write(prometheus_text())
+    os.replace(tmp_path, METRICS_FILE)
+
+# Function to end the rerun on this thread, returning its ([(stage, depth, seconds)], {(cache, result): count})
+def finish_rerun():
+    _close_stage()
+    spans = getattr(_local, 'spans', None) or []
+    counts = getattr(_local, 'counts', None) or {}
+    if getattr(_local, 'started', None) is not None:
+        total = time.perf_counter() - _local.started
+        observe('rerun', total)
+        spans = [('rerun', 0, total)] + [(stage, depth + 1, seconds) for stage, depth, seconds in spans]
+    _local.spans = _local.counts = _local.started = None
+    return spans, counts
+
+# Function to close a script's rerun: record its timings, write the metrics file when due and, if
+# enabled with ?debug=1 in the URL or TRACING_DEBUG_PANEL=1, show the timings in the sidebar
+def debug_panel():
+    import streamlit as st
+    spans, counts = finish_rerun()
+    flush_metrics()
+    if st.query_params.get('debug') != '1' and os.environ.get('TRACING_DEBUG_PANEL') != '1':
+        return
+    with st.sidebar.expander('Debug: rerun timings', expanded=True):
+        st.text('\n'.join(f'{"  " * depth}{stage:<{28 - 2 * depth}} {seconds * 1000:8.1f} ms'
+                          for stage, depth, seconds in spans if seconds is not None))
+        if counts:
+            st.text('\n'.join(f'{cache:<12} {result:<8} {total:4d}' for (cache, result), total in sorted(counts.items())))
+        for cache, sizes in sorted(memory_report().items()):
+            largest = sorted(sizes, key=lambda entry: entry[1], reverse=True)[:DEBUG_MEMORY_ROWS]
+            st.text(f'{cache}: {sum(size for _, size in sizes) / 2 ** 20:.1f} MiB in {len(sizes)} entries\n' +
+                    '\n'.join(f'  {str(key)[:36]:<36} {size / 2 ** 10:9.1f} KiB' for key, size in largest))
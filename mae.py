@@ -1,11 +1,19 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
+from core.data_cache import load_window, required_start
+from core.scheduler import as_of_caption, watch
+from core.overlay import FrameOverlay
+from core.symbols import ticker_input
+from core.tracing import debug_panel, stage, start_rerun
 
-# Function to fetch stock data
+# Bars loaded before the start date so the longest moving average (200) is warmed up on the first shown day
+WARMUP_BARS = 200
+
+# Function to fetch stock data, including the warm-up bars before start_date, from the background-refreshed cache
 def fetch_stock_data(ticker, start_date, end_date):
-    data = yf.download(ticker, start=start_date, end=end_date)
+    watch([ticker], start=required_start(WARMUP_BARS, end=start_date))
+    data = load_window(ticker, start_date, end_date, WARMUP_BARS, max_age=None)
     return data
 
 # Function to calculate moving average and envelopes
@@ -15,14 +23,16 @@ def calculate_moving_average_envelope(df, window, envelope_pct):
     df['Lower Envelope'] = df['MA'] * (1 - envelope_pct / 100)
     return df
 
-# Function to create the plot
-def plot_moving_average_envelope(df, ma_period, envelope_pct):
+# Function to create the plot; df includes warm-up bars, only dates from start_date on are shown
+def plot_moving_average_envelope(df, ma_period, envelope_pct, start_date):
     fig = go.Figure()
+    shown = df.index.searchsorted(pd.Timestamp(start_date))
     
-    fig.add_trace(go.Scatter(x=df.index, y=df['Close'], mode='lines', name='Close Price', line=dict(color='blue', width=2)))
+    fig.add_trace(go.Scatter(x=df.index[shown:], y=df['Close'].iloc[shown:], mode='lines', name='Close Price', line=dict(color='blue', width=2)))
     
     if ma_period != 'None':
-        df_ma = calculate_moving_average_envelope(df.copy(), ma_period, envelope_pct)
+        # The envelope columns go into an overlay, so the cached bars are neither copied nor modified
+        df_ma = calculate_moving_average_envelope(FrameOverlay(df), ma_period, envelope_pct)[shown:]
         
         # Plotting the moving average
         fig.add_trace(go.Scatter(x=df_ma.index, y=df_ma['MA'], mode='lines', name=f'MA {ma_period}', line=dict(color='orange', width=2, dash='dash')))
@@ -44,10 +54,11 @@ def plot_moving_average_envelope(df, ma_period, envelope_pct):
 
 # Streamlit app
 def main():
+    start_rerun('mae')
     st.title("Moving Average Envelope Visualization")
     
     # User input for stock and dates
-    ticker = st.text_input("Enter stock ticker:", "GOOGL")
+    ticker = ticker_input("Enter stock ticker:", "GOOGL")
     start_date = st.date_input("Start date", pd.to_datetime("2023-01-01"))
     end_date = st.date_input("End date", pd.to_datetime("2024-01-01"))
     
@@ -56,8 +67,9 @@ def main():
     
     # Fetch and display data
     if ticker:
+        stage('load')
         data = fetch_stock_data(ticker, start_date, end_date)
-        if data.empty:
+        if data[data.index >= pd.Timestamp(start_date)].empty:
             st.error(f"No data found for ticker {ticker}.")
         else:
             # User input for moving average period
@@ -65,8 +77,12 @@ def main():
             ma_period = st.selectbox("Select Moving Average Period:", ma_options)
             
             # Plot
-            fig = plot_moving_average_envelope(data, ma_period, envelope_pct)
+            stage('figure')
+            fig = plot_moving_average_envelope(data, ma_period, envelope_pct, start_date)
+            stage('render')
             st.plotly_chart(fig)
+            st.caption(as_of_caption([ticker]))
+    debug_panel()
             
 if __name__ == "__main__":
     main()
@@ -0,0 +1,48 @@
+import streamlit as st
+from core.data_cache import cached_tickers, required_start
+from core.prefetch import prefetch
+from core.screener import MIN_BARS, RULES, SCREEN_BARS, screen
+from core.symbols import check_ticker
+from core.tracing import debug_panel, stage, start_rerun
+
+start_rerun('screener')
+
+st.set_page_config(page_title="Indicator Screener", layout="wide")
+st.title('Indicator Screener')
+
+stage('controls')
+# Universe to screen: everything already cached, or a typed list that is cached first
+universe = st.radio('Universe', ['Cached tickers', 'Ticker list'], horizontal=True)
+if universe == 'Ticker list':
+    typed = st.text_area('Tickers (separated by spaces or commas)', 'AAPL MSFT GOOGL AMZN META NVDA')
+    checked = [check_ticker(text) for text in typed.replace(',', ' ').split()]
+    tickers = [ticker for ticker, problem, _ in checked if problem is None]
+    rejected = [ticker for ticker, problem, _ in checked if problem is not None]
+    if rejected:
+        st.warning(f'Skipped unknown tickers: {", ".join(rejected)}')
+else:
+    tickers = cached_tickers()
+
+# Rules, and how many of them a ticker must match to be listed
+rules = st.multiselect('Rules', list(RULES), default=['Close above EMA 200', 'RSI below 30'])
+match = st.radio('Show', ['Tickers matching all rules', 'Tickers matching any rule', 'Every ticker'], horizontal=True)
+lookback = st.slider('Crossovers within the last (trading days)', 1, 20, 5)
+
+if universe == 'Ticker list':
+    stage('load')
+    # The screener only reads cached bars, so bring the listed tickers into the cache first
+    prefetch(tickers, start=required_start(SCREEN_BARS))
+
+stage('screen')
+results = screen(tickers, rules, lookback, match={'Tickers matching all rules': 'all',
+                                                  'Tickers matching any rule': 'any'}.get(match))
+
+stage('render')
+short = results['Bars'] < MIN_BARS
+if short.any():
+    st.warning(f'Insufficient history (fewer than {MIN_BARS} cached bars): {", ".join(results.index[short])}')
+results = results[~short]
+# Click a column header to sort by it
+st.caption(f'{len(results)} of {len(tickers)} tickers')
+st.dataframe(results, width='stretch')
+debug_panel()
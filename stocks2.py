@@ -1,9 +1,15 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
-import plotly.graph_objs as go  # Import Plotly's graph objects
 from plotly.subplots import make_subplots  # Import make_subplots for subplots arrangement
+from core.charts import line_trace, volume_trace
+from core.data_cache import load_history, load_indicators
+from core.scheduler import as_of_caption, watch
+from core.streaming import EMAState, RSIState
+from core.export import FORMATS, export_button
+from core.tracing import debug_panel, stage, start_rerun
+
+start_rerun('stocks2')
 
 # Define a dictionary mapping stock names to their ticker symbols
 stocks = {
@@ -14,6 +20,9 @@ stocks = {
     "Nvidia": "NVDA"
 }
 
+# Keep every stock cached and refreshed in the background, so switching stocks is a cache hit
+watch(list(stocks.values()))
+
 # Page title and description
 st.title('Interactive Stock Chart App')
 st.write('Select a stock to view its chart:')
@@ -28,40 +37,47 @@ st.write(f'Stock selected: {selected_stock} ({stocks[selected_stock]})')
 end_date = datetime.now()
 start_date = end_date - timedelta(days=5*365)  # Assuming 365 days per year
 
-# Fetch historical data from Yahoo Finance
+# Streaming indicator states for this chart, keyed by output column
+def make_indicator_states():
+    return {
+        'EMA20': EMAState(20),
+        'EMA50': EMAState(50),
+        'EMA200': EMAState(200),
+        'RSI': RSIState(14, min_periods=1),
+    }
+
+# Function to get a stock's last 5 years of bars with their EMAs and RSI
+def load_stock_data(ticker):
+    # Fetch historical data from the cache, which only downloads bars it has not seen yet
+    history = load_history(ticker, max_age=None)
+
+    # Calculate EMAs and RSI incrementally over the full history, then keep the last 5 years
+    indicators = load_indicators(ticker, history, make_indicator_states)
+    stock_data = history.join(indicators)
+    return stock_data[(stock_data.index >= start_date) & (stock_data.index < end_date)]
+
+stage('load')
 ticker_symbol = stocks[selected_stock]
-stock_data = yf.download(ticker_symbol, start=start_date, end=end_date)
-
-# Calculate EMAs
-stock_data['EMA20'] = stock_data['Close'].ewm(span=20, adjust=False).mean()
-stock_data['EMA50'] = stock_data['Close'].ewm(span=50, adjust=False).mean()
-stock_data['EMA200'] = stock_data['Close'].ewm(span=200, adjust=False).mean()
-
-# Calculate RSI
-delta = stock_data['Close'].diff()
-gain = delta.where(delta > 0, 0)
-loss = -delta.where(delta < 0, 0)
-avg_gain = gain.rolling(window=14, min_periods=1).mean()
-avg_loss = loss.rolling(window=14, min_periods=1).mean()
-rs = avg_gain / avg_loss
-rsi = 100 - (100 / (1 + rs))
+stock_data = load_stock_data(ticker_symbol)
+rsi = stock_data['RSI']
 
+stage('figure')
 # Create a subplot figure with make_subplots
 fig = make_subplots(rows=3, cols=1, shared_xaxes=True, 
                     subplot_titles=(f'{selected_stock} Stock Price with EMAs', 'RSI (14 days)', 'Volume'),
                     vertical_spacing=0.1)  # Adjust vertical spacing between subplots
 
 # Add traces for stock price and EMAs to the main subplot
-fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['Close'], mode='lines', name='Close'), row=1, col=1)
-fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['EMA20'], mode='lines', name='EMA 20'), row=1, col=1)
-fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['EMA50'], mode='lines', name='EMA 50'), row=1, col=1)
-fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['EMA200'], mode='lines', name='EMA 200'), row=1, col=1)
+fig.add_trace(line_trace(stock_data['Close'], name='Close'), row=1, col=1)
+fig.add_trace(line_trace(stock_data['EMA20'], name='EMA 20'), row=1, col=1)
+fig.add_trace(line_trace(stock_data['EMA50'], name='EMA 50'), row=1, col=1)
+fig.add_trace(line_trace(stock_data['EMA200'], name='EMA 200'), row=1, col=1)
 
 # Add RSI trace to the second subplot (RSI)
-fig.add_trace(go.Scatter(x=stock_data.index, y=rsi, mode='lines', name='RSI (14 days)'), row=2, col=1)
+fig.add_trace(line_trace(rsi, name='RSI (14 days)'), row=2, col=1)
 
 # Add Volume trace to the third subplot (Volume)
-fig.add_trace(go.Bar(x=stock_data.index, y=stock_data['Volume'], name='Volume'), row=3, col=1)
+fig.add_trace(volume_trace(stock_data, name='Volume'), row=3, col=1)
 
 # Customize chart layout
 fig.update_layout(
@@ -81,10 +97,19 @@ fig.update_yaxes(scaleanchor='x', scaleratio=0.6, row=1, col=1)  # Main chart (6
 fig.update_yaxes(scaleanchor='x', scaleratio=0.2, row=2, col=1)  # RSI subplot (20% of height)
 fig.update_yaxes(scaleanchor='x', scaleratio=0.2, row=3, col=1)  # Volume subplot (20% of height)
 
+stage('render')
 # Display the plotly chart
 st.plotly_chart(fig)
-
-# Export data as CSV
-if st.button('Export Data as CSV'):
-    csv_file = stock_data.to_csv(index=False)
-    st.download_button(label='Download CSV', data=csv_file, file_name=f'{selected_stock}_data.csv', mime='text/csv')
+st.caption(as_of_caption([ticker_symbol]))
+
+stage('export')
+# Export the last 5 years with dates and the chosen columns; several stocks download as one zip
+st.subheader('Export Data')
+export_stocks = st.multiselect('Stocks to export', list(stocks.keys()), default=[selected_stock])
+export_columns = st.multiselect('Columns to export', list(stock_data.columns), default=list(stock_data.columns))
+export_format = st.radio('Export format', list(FORMATS), horizontal=True)
+export_button(export_stocks, lambda name: load_stock_data(stocks[name]),
+              f'{export_stocks[0]}_data' if len(export_stocks) == 1 else 'stocks_data', export_format,
+              columns=export_columns)
+
+debug_panel()
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import backtest
+
+# Function to make a random-walk close series
+def closes(count=500, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 80 * np.exp(np.cumsum(rng.normal(0, 0.02, count)))
+    return pd.Series(close, index=pd.bdate_range('2022-01-03', periods=count, name='Date'))
+
+# Reference: trade bar by bar. A position set at a bar's close earns the next bar's return, and
+# every change of position costs `cost`; returns (total return, maximum drawdown)
+def loop_performance(prices, positions, cost):
+    equity = peak = 1.0
+    worst = 0.0
+    held = 0.0
+    for t in range(len(prices)):
+        if t > 0 and held:
+            equity *= prices[t] / prices[t - 1]
+        if positions[t] != held:
+            equity *= 1 - cost
+            held = positions[t]
+        peak = max(peak, equity)
+        worst = min(worst, equity / peak - 1)
+    return equity - 1, worst
+
+# Function to get the bar a date falls on, as the sweeps do
+def first_bar(close, start):
+    return 0 if start is None else close.index.searchsorted(pd.Timestamp(start))
+
+
+@pytest.mark.parametrize('start, cost', [(None, 0.0), ('2022-06-01', 0.001)])
+def test_crossover_cell_matches_loop(start, cost):
+    close = closes()
+    total, drawdown = backtest.crossover_sweep(close, [5, 10, 20], [30, 50], start=start, cost=cost)
+    first = first_bar(close, start)
+    for short, long in [(5, 30), (20, 50)]:
+        # The averages warm up on the bars before `start`, as the hero dashboards draw them
+        short_ma = close.rolling(window=short, min_periods=1).mean()
+        long_ma = close.rolling(window=long, min_periods=1).mean()
+        positions = (short_ma > long_ma).astype(float).to_numpy()[first:]
+        expected = loop_performance(close.to_numpy()[first:], positions, cost)
+        assert total.loc[short, long] == pytest.approx(expected[0], rel=1e-9, abs=1e-12)
+        assert drawdown.loc[short, long] == pytest.approx(expected[1], rel=1e-9, abs=1e-12)
+    assert total.shape == drawdown.shape == (3, 2)
+
+
+@pytest.mark.parametrize('start, cost', [(None, 0.0), ('2022-06-01', 0.002)])
+def test_envelope_cell_matches_loop(start, cost, monkeypatch):
+    # Small chunks, so the grid is evaluated over several of them
+    monkeypatch.setattr(backtest, 'MAX_CELLS', 1000)
+    close = closes()
+    total, drawdown = backtest.envelope_sweep(close, [10, 20], [1.0, 2.5, 5.0], start=start, cost=cost)
+    first = first_bar(close, start)
+    prices = close.to_numpy()
+    for period, pct in [(10, 1.0), (20, 2.5)]:
+        # As mae.py trades it: buy below the lower envelope, sell above the upper one
+        ma = close.rolling(window=period).mean().to_numpy()
+        positions, held = [], 0.0
+        for price, mean in zip(prices[first:], ma[first:]):
+            if price > mean * (1 + pct / 100):
+                held = 0.0
+            elif price < mean * (1 - pct / 100):
+                held = 1.0
+            positions.append(held)
+        expected = loop_performance(prices[first:], positions, cost)
+        assert total.loc[period, pct] == pytest.approx(expected[0], rel=1e-9, abs=1e-12)
+        assert drawdown.loc[period, pct] == pytest.approx(expected[1], rel=1e-9, abs=1e-12)
+
+
+def test_crossover_skips_pairs_without_a_shorter_short_window():
+    total, drawdown = backtest.crossover_sweep(closes(100), [10, 30], [20, 30])
+    assert np.isnan(total.loc[30, 20]) and np.isnan(total.loc[30, 30]) and np.isnan(drawdown.loc[30, 30])
+    assert not np.isnan(total.loc[10, 20])
+
+
+def test_buy_and_hold_from_start():
+    close = closes()
+    first = first_bar(close, '2022-06-01')
+    assert backtest.buy_and_hold(close, '2022-06-01') == pytest.approx(close.iloc[-1] / close.iloc[first] - 1)
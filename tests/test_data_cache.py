@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data_cache, shared_cache
+from core.providers import LocalProvider
+
+# Function to make daily bars around `level` for the business days from 2024-01-01
+def make_bars(count, level=15.0, seed=5):
+    rng = np.random.default_rng(seed)
+    close = level * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    index = pd.bdate_range('2024-01-01', periods=count, name='Date')
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Adj Close': close, 'Volume': np.full(count, 1000.0)}, index=index)
+
+
+# Local provider over a fixture directory, recording every download's (start, end)
+class RecordingProvider(LocalProvider):
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        self.calls = []
+
+    def download(self, ticker, start=None, end=None, period=None):
+        self.calls.append((start, end))
+        return super().download(ticker, start=start, end=end, period=period)
+
+    # Function to replace the bars the provider serves
+    def serve(self, bars):
+        bars.to_parquet(self._path('TEST', '.parquet'))
+
+
+@pytest.fixture
+def provider(tmp_path, monkeypatch):
+    (tmp_path / 'fx').mkdir()
+    provider = RecordingProvider(str(tmp_path / 'fx'))
+    monkeypatch.setattr(data_cache, 'get_provider', lambda: provider)
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path / 'ohlcv'))
+    monkeypatch.setattr(shared_cache, '_store', shared_cache.SharedFrameStore(str(tmp_path / 'shared')))
+    return provider
+
+# Function to compare the stored bars with the bars the provider serves from `start` on
+def assert_stored(bars, start=None):
+    expected = bars if start is None else bars[bars.index >= start]
+    stored = data_cache.read_cached('TEST')
+    assert stored.index.equals(expected.index)
+    np.testing.assert_allclose(stored['Close'].to_numpy(dtype=float), expected['Close'], rtol=1e-6)
+
+
+def test_tail_is_appended_and_partial_bar_replaced(provider):
+    bars = make_bars(100)
+    provider.serve(bars.iloc[:90])
+    data_cache.refresh_history('TEST', start=bars.index[20])
+    # The last cached bar was still forming; the provider now has its final price and ten more bars
+    bars.iloc[89, bars.columns.get_loc('Close')] *= 1.02
+    provider.serve(bars)
+    provider.calls.clear()
+    data_cache.refresh_history('TEST', start=bars.index[20])
+    assert_stored(bars, bars.index[20])
+    assert provider.calls == [(bars.index[88], None)]
+    assert data_cache.read_meta('TEST')[0] == bars.index[20]
+
+
+def test_head_is_extended_when_coverage_is_short(provider):
+    bars = make_bars(100)
+    provider.serve(bars)
+    data_cache.refresh_history('TEST', start=bars.index[50])
+    assert not data_cache.covers(data_cache.read_meta('TEST')[0], bars.index[10])
+    data_cache.refresh_history('TEST', start=bars.index[10])
+    assert_stored(bars, bars.index[10])
+    assert data_cache.covers(data_cache.read_meta('TEST')[0], bars.index[10])
+
+
+def test_readjusted_history_is_fetched_again(provider):
+    bars = make_bars(100)
+    provider.serve(bars.iloc[:90])
+    data_cache.refresh_history('TEST', start=bars.index[20])
+    # A 4:1 split: the provider rescales its whole history, and a new bar arrives
+    split = bars.copy()
+    split[data_cache.PRICE_COLUMNS] /= 4
+    provider.serve(split)
+    provider.calls.clear()
+    data_cache.refresh_history('TEST', start=bars.index[20])
+    assert_stored(split, bars.index[20])
+    assert provider.calls[-1] == (bars.index[20], None)
+    # No bar is left on the old basis
+    assert (data_cache.read_cached('TEST')['Close'].pct_change().abs() < 0.1).iloc[1:].all()
+
+
+def test_small_dividend_adjustment_is_detected():
+    bars = make_bars(10)
+    adjusted = bars.copy()
+    adjusted['Adj Close'] *= 0.998
+    assert data_cache.readjusted(bars, adjusted)
+    assert not data_cache.readjusted(bars, bars.iloc[-2:])
+    assert not data_cache.readjusted(bars.iloc[:1], adjusted)
@@ -0,0 +1,53 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from core import export
+
+FRAMES = {
+    name: pd.DataFrame({'Close': np.arange(rows, dtype=float), 'Volume': np.arange(rows)},
+                       index=pd.date_range('2024-01-01', periods=rows, name='Date'))
+    for name, rows in (('AAA', 7), ('BBB', 12))
+}
+
+# Function to read one exported file back into a frame
+def read_back(fmt, data):
+    if fmt == 'CSV':
+        return pd.read_csv(io.BytesIO(data), index_col='Date', parse_dates=True)
+    if fmt == 'Parquet':
+        return pq.read_table(io.BytesIO(data)).to_pandas()
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all().to_pandas()
+
+# Function to click an export button: the bytes Streamlit serves for its deferred data
+def download(names, fmt, monkeypatch):
+    buttons = []
+    monkeypatch.setattr(export.st, 'download_button', lambda **kwargs: buttons.append(kwargs))
+    export.export_button(names, FRAMES.get, 'stocks', fmt)
+    data, _ = convert_data_to_bytes_and_infer_mime(buttons[0]['data'](), TypeError('unsupported'))
+    return buttons[0]['file_name'], data
+
+
+@pytest.mark.parametrize('fmt', list(export.FORMATS))
+def test_single_export_is_served(fmt, monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_ROWS', 5)
+    file_name, data = download(['AAA'], fmt, monkeypatch)
+    assert file_name == f'stocks.{export.FORMATS[fmt][0]}'
+    pd.testing.assert_frame_equal(read_back(fmt, data), FRAMES['AAA'], check_freq=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('fmt', list(export.FORMATS))
+def test_zip_export_is_served(fmt, monkeypatch):
+    # Past the spool size the export is written to disk
+    monkeypatch.setattr(export, 'SPOOL_BYTES', 64)
+    file_name, data = download(list(FRAMES), fmt, monkeypatch)
+    assert file_name == 'stocks.zip'
+    with zipfile.ZipFile(io.BytesIO(data)) as bundle:
+        for name, frame in FRAMES.items():
+            exported = read_back(fmt, bundle.read(f'{name}.{export.FORMATS[fmt][0]}'))
+            pd.testing.assert_frame_equal(exported, frame, check_freq=False, check_index_type=False)
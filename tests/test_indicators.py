@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import indicators
+
+BARS = 400
+
+# Rows of the test matrix: a full history, one NaN-padded on the left (a ticker listed later) and
+# ones with gaps (bars a ticker has no close for), each paired with its number of padding bars
+def price_rows():
+    rng = np.random.default_rng(7)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(4, BARS)), axis=1))
+    prices[1, :150] = np.nan
+    prices[2, [30, 31, 32, 200, 333]] = np.nan
+    prices[3, :60] = np.nan
+    prices[3, [100, 250, 251]] = np.nan
+    return prices, [0, 150, 0, 60]
+
+# Reference implementations: the per-Series pandas code of the apps
+def pandas_ema(close, span):
+    return close.ewm(span=span, adjust=False).mean()
+
+def pandas_sma(close, window, min_periods=None):
+    return close.rolling(window=window, min_periods=min_periods).mean()
+
+def pandas_rsi(close, window=14, min_periods=None):
+    delta = close.diff(1)
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=window, min_periods=min_periods).mean()
+    avg_loss = loss.rolling(window=window, min_periods=min_periods).mean()
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+def pandas_bollinger(close, window=20, num_std_dev=2):
+    mean = close.rolling(window=window, min_periods=1).mean()
+    std = close.rolling(window=window, min_periods=1).std()
+    return mean, mean + num_std_dev * std, mean - num_std_dev * std
+
+# Function to compare each matrix row with the pandas result on the row's own bars (padding dropped);
+# the padding itself must stay NaN
+def assert_rows_match(batched, reference):
+    prices, pads = price_rows()
+    for row, pad in enumerate(pads):
+        expected = reference(pd.Series(prices[row, pad:])).to_numpy()
+        assert np.isnan(batched[row, :pad]).all()
+        np.testing.assert_allclose(batched[row, pad:], expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize('span', [12, 20, 200])
+def test_ema_matches_pandas(span):
+    prices, _ = price_rows()
+    spans = [5, span]
+    assert_rows_match(indicators.ema(prices, spans)[1], lambda close: pandas_ema(close, span))
+
+
+@pytest.mark.parametrize('min_periods', [None, 1])
+def test_sma_matches_pandas(min_periods):
+    prices, _ = price_rows()
+    batched = indicators.sma(prices, [20, 50], min_periods=min_periods)
+    assert_rows_match(batched[0], lambda close: pandas_sma(close, 20, min_periods))
+    assert_rows_match(batched[1], lambda close: pandas_sma(close, 50, min_periods))
+
+
+@pytest.mark.parametrize('min_periods', [None, 1])
+def test_rsi_matches_pandas(min_periods):
+    prices, _ = price_rows()
+    assert_rows_match(indicators.rsi(prices, 14, min_periods)[0], lambda close: pandas_rsi(close, 14, min_periods))
+
+
+def test_macd_matches_pandas():
+    prices, _ = price_rows()
+    macd_line, signal_line = indicators.macd(prices)
+    reference = lambda close: pandas_ema(close, 12) - pandas_ema(close, 26)
+    assert_rows_match(macd_line, reference)
+    assert_rows_match(signal_line, lambda close: pandas_ema(reference(close), 9))
+
+
+def test_bollinger_matches_pandas():
+    prices, _ = price_rows()
+    middle, upper, lower = indicators.bollinger(prices, 20, [1, 2])
+    for position, band in enumerate((middle[0], upper[0, 1], lower[0, 1])):
+        assert_rows_match(band, lambda close: pandas_bollinger(close, 20, 2)[position])
+
+
+def test_envelope_matches_pandas():
+    prices, _ = price_rows()
+    ma, upper, lower = indicators.envelope(prices, [20], [2.5, 5])
+    assert_rows_match(upper[0, 1], lambda close: pandas_sma(close, 20) * 1.05)
+    assert_rows_match(lower[0, 0], lambda close: pandas_sma(close, 20) * 0.975)
+
+
+def test_price_matrix_pads_missing_bars():
+    dates = pd.date_range('2024-01-01', periods=5)
+    frames = {'AAA': pd.DataFrame({'Close': [1.0, 2, 3, 4, 5]}, index=dates),
+              'BBB': pd.DataFrame({'Close': [7.0, 9]}, index=dates[[2, 4]])}
+    tickers, index, prices = indicators.price_matrix(frames)
+    assert tickers == ['AAA', 'BBB'] and index.equals(dates)
+    np.testing.assert_array_equal(prices[1], [np.nan, np.nan, 7, np.nan, 9])
@@ -0,0 +1,174 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core import providers
+from core.providers import GuardedProvider, MarketDataProvider, SingleFlight, TokenBucket
+
+THREADS = 8
+
+
+# Upstream that counts its calls and blocks each one until released; fails while `failures` is positive
+class SlowProvider(MarketDataProvider):
+    def __init__(self, failures=0):
+        self.calls = 0
+        self.batches = []
+        self.failures = failures
+        self.release = threading.Event()
+        self.release.set()
+
+    def download(self, ticker, start=None, end=None, period=None):
+        self.calls += 1
+        self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError(f'{ticker} failed')
+        return {'ticker': ticker, 'call': self.calls}
+
+    def download_many(self, tickers, start=None, end=None):
+        self.batches.append(list(tickers))
+        self.release.wait(5)
+        return {ticker: {'ticker': ticker, 'batch': len(self.batches)} for ticker in tickers}
+
+
+# Clock whose sleeps only move time forward
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+# Function to call `fn` from THREADS threads at once, once the first call is in flight and every
+# other thread waits on it; returns each thread's result or exception
+def call_together(fn, upstream, monkeypatch):
+    shared = threading.Semaphore(0)
+    monkeypatch.setattr(providers, 'count', lambda *args: shared.release() if args[-1] == 'shared' else None)
+    upstream.release.clear()
+
+    def call():
+        try:
+            return fn()
+        except Exception as error:
+            return error
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        futures = [pool.submit(call) for _ in range(THREADS)]
+        for _ in range(THREADS - 1):
+            assert shared.acquire(timeout=5)
+        upstream.release.set()
+        return [future.result() for future in futures]
+
+
+def test_identical_calls_share_one_upstream_request(monkeypatch):
+    upstream = SlowProvider()
+    guarded = GuardedProvider(upstream, rate=None)
+    results = call_together(lambda: guarded.download('aapl', start='2024-01-01'), upstream, monkeypatch)
+    assert upstream.calls == 1
+    assert all(result is results[0] for result in results)
+    # The flight is over, so a later call goes upstream again
+    guarded.download('AAPL', start='2024-01-01')
+    assert upstream.calls == 2
+
+
+def test_followers_see_the_leaders_exception(monkeypatch):
+    upstream = SlowProvider(failures=1)
+    guarded = GuardedProvider(upstream, rate=None, attempts=1)
+    results = call_together(lambda: guarded.download('AAPL'), upstream, monkeypatch)
+    assert upstream.calls == 1
+    assert all(isinstance(result, ConnectionError) and result is results[0] for result in results)
+
+
+def test_batch_waits_for_a_single_download_in_flight(monkeypatch):
+    upstream = SlowProvider()
+    upstream.release.clear()
+    guarded = GuardedProvider(upstream, rate=None)
+    shared = threading.Semaphore(0)
+    monkeypatch.setattr(providers, 'count', lambda *args: shared.release() if args[-1] == 'shared' else None)
+    with ThreadPoolExecutor(2) as pool:
+        single = pool.submit(guarded.download, 'AAPL', start='2024-01-01')
+        while upstream.calls == 0:
+            threading.Event().wait(0.01)
+        batch = pool.submit(guarded.download_many, ['MSFT', 'AAPL', 'NVDA'], start='2024-01-01')
+        assert shared.acquire(timeout=5)
+        upstream.release.set()
+        frames = batch.result()
+    # AAPL was fetched once, by the single download, and the batch asked only for the others
+    assert upstream.calls == 1 and upstream.batches == [['MSFT', 'NVDA']]
+    assert frames['AAPL'] is single.result() and frames['MSFT'] == {'ticker': 'MSFT', 'batch': 1}
+
+
+def test_single_download_waits_for_a_batch_in_flight():
+    upstream = SlowProvider()
+    upstream.release.clear()
+    guarded = GuardedProvider(upstream, rate=None)
+    with ThreadPoolExecutor(2) as pool:
+        batch = pool.submit(guarded.download_many, ['MSFT', 'AAPL'], start='2024-01-01')
+        while not upstream.batches:
+            threading.Event().wait(0.01)
+        single = pool.submit(guarded.download, 'aapl', start='2024-01-01')
+        upstream.release.set()
+        assert single.result() is batch.result()['AAPL']
+    assert upstream.calls == 0 and upstream.batches == [['MSFT', 'AAPL']]
+
+
+def test_different_keys_do_not_share():
+    flights = SingleFlight()
+    assert [flights.do(key, lambda key=key: key * 2) for key in (1, 2, 1)] == [2, 4, 2]
+
+
+def test_token_bucket_paces_after_the_burst(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(providers, 'time', clock)
+    bucket = TokenBucket(rate=2, burst=3)
+    granted = []
+    for _ in range(7):
+        bucket.acquire()
+        granted.append(clock.now)
+    assert granted == pytest.approx([0, 0, 0, 0.5, 1.0, 1.5, 2.0])
+    # Idle time refills the bucket, but never past the burst
+    clock.now += 10
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now == pytest.approx(12.5)
+
+
+def test_failures_are_retried_with_doubling_backoff(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(providers, 'time', clock)
+    monkeypatch.setattr(providers.random, 'uniform', lambda low, high: 1.0)
+    upstream = SlowProvider(failures=2)
+    guarded = GuardedProvider(upstream, rate=None, attempts=3, backoff=0.5)
+    assert guarded.download('AAPL') == {'ticker': 'AAPL', 'call': 3}
+    assert clock.sleeps == [0.5, 1.0]
+
+
+def test_last_failure_is_raised_after_every_attempt(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(providers, 'time', clock)
+    upstream = SlowProvider(failures=5)
+    guarded = GuardedProvider(upstream, rate=None, attempts=3, backoff=1.0)
+    with pytest.raises(ConnectionError):
+        guarded.download('AAPL')
+    assert upstream.calls == 3
+    # Jitter keeps each delay within half to one and a half times the doubling backoff
+    assert len(clock.sleeps) == 2
+    assert 0.5 <= clock.sleeps[0] <= 1.5 and 1.0 <= clock.sleeps[1] <= 3.0
+
+
+def test_every_attempt_takes_a_token(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(providers, 'time', clock)
+    monkeypatch.setattr(providers.random, 'uniform', lambda low, high: 1.0)
+    upstream = SlowProvider(failures=1)
+    guarded = GuardedProvider(upstream, rate=1, burst=1, attempts=2, backoff=0.25)
+    guarded.download('AAPL')
+    # The retry waits out its backoff, then the rest of the second the bucket needs to refill
+    assert clock.sleeps == pytest.approx([0.25, 0.75])
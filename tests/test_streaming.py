@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data_cache
+from core.streaming import BollingerState, EMAState, MACDState, RSIState
+
+# Indicator states as stocks2.py sets them up, plus the MACD and Bollinger states
+def make_states():
+    return {
+        'EMA20': EMAState(20),
+        'EMA200': EMAState(200),
+        'RSI': RSIState(14, min_periods=1),
+        'MACD|Signal Line': MACDState(),
+        'Middle Band|Upper Band|Lower Band': BollingerState(20, 2),
+    }
+
+# Reference: the same columns from the apps' pandas code over the whole history
+def pandas_indicators(close):
+    delta = close.diff(1)
+    avg_gain = delta.where(delta > 0, 0).rolling(window=14, min_periods=1).mean()
+    avg_loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    middle = close.rolling(window=20, min_periods=1).mean()
+    std = close.rolling(window=20, min_periods=1).std()
+    return pd.DataFrame({
+        'EMA20': close.ewm(span=20, adjust=False).mean(),
+        'EMA200': close.ewm(span=200, adjust=False).mean(),
+        'RSI': 100 - (100 / (1 + avg_gain / avg_loss)),
+        'MACD': macd,
+        'Signal Line': macd.ewm(span=9, adjust=False).mean(),
+        'Middle Band': middle,
+        'Upper Band': middle + 2 * std,
+        'Lower Band': middle - 2 * std,
+    })
+
+def bars(count):
+    rng = np.random.default_rng(11)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, count)))
+    return pd.DataFrame({'Close': close}, index=pd.bdate_range('2023-01-02', periods=count, name='Date'))
+
+
+@pytest.fixture
+def advanced(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path))
+    # Record how many closes each call advances the states over
+    lengths = []
+    advance = data_cache.advance
+    monkeypatch.setattr(data_cache, 'advance', lambda states, closes: lengths.append(len(closes)) or advance(states, closes))
+    return lengths
+
+def assert_matches_pandas(result, data):
+    expected = pandas_indicators(data['Close'])
+    pd.testing.assert_frame_equal(result[expected.columns], expected, rtol=1e-9, atol=1e-9, check_freq=False)
+
+
+def test_resume_across_calls_matches_pandas(advanced):
+    data = bars(300)
+    # Three reruns as new bars arrive: each resumes from the states committed by the previous one
+    for end in (250, 251, 300):
+        assert_matches_pandas(data_cache.load_indicators('TEST', data.iloc[:end], make_states), data.iloc[:end])
+    # The last bar of each call is only peeked at, so it is advanced over again next time
+    assert advanced == [250, 2, 50]
+
+
+def test_gaps_match_pandas_across_calls(advanced):
+    data = bars(300)
+    # Closes missing for a day and for a stretch; calls resume right after, inside and after the gaps
+    data.iloc[[40, 151, 152, 153, 154, 155], 0] = np.nan
+    for end in (42, 153, 300):
+        assert_matches_pandas(data_cache.load_indicators('TEST', data.iloc[:end], make_states), data.iloc[:end])
+    assert advanced == [42, 112, 148]
+
+
+def test_revised_last_bar_is_recomputed(advanced):
+    data = bars(120)
+    data_cache.load_indicators('TEST', data, make_states)
+    revised = data.copy()
+    revised.iloc[-1, 0] *= 1.03
+    assert_matches_pandas(data_cache.load_indicators('TEST', revised, make_states), revised)
+    assert advanced == [120, 1]
+
+
+def test_readjusted_history_is_not_resumed(advanced):
+    data = bars(200)
+    data_cache.load_indicators('TEST', data.iloc[:150], make_states)
+    # A split rescales every bar, including the one the stored states were committed at
+    readjusted = data / 4
+    assert_matches_pandas(data_cache.load_indicators('TEST', readjusted, make_states), readjusted)
+    assert advanced == [150, 200]
+
+
+def test_history_from_another_start_is_not_resumed(advanced):
+    data = bars(200)
+    data_cache.load_indicators('TEST', data.iloc[50:150], make_states)
+    assert_matches_pandas(data_cache.load_indicators('TEST', data, make_states), data)
+    assert advanced == [100, 200]
@@ -0,0 +1,76 @@
+import csv
+import logging
+import time
+
+import pytest
+
+from core import data_cache, symbols
+from core.providers import empty_frame
+from core.symbols import SymbolIndex, check_ticker
+
+NAMES = {'AAPL': 'Apple', 'AMD': 'Advanced Micro Devices', 'AMZN': 'Amazon', 'GOOG': 'Alphabet C',
+         'GOOGL': 'Alphabet A', 'BRK-B': 'Berkshire Hathaway B', 'MSFT': 'Microsoft'}
+
+
+@pytest.fixture
+def listing(tmp_path, monkeypatch):
+    path = tmp_path / 'symbols.csv'
+    with open(path, 'w', newline='') as out:
+        writer = csv.writer(out)
+        writer.writerow(['Symbol', 'Name'])
+        writer.writerows(NAMES.items())
+    monkeypatch.setattr(symbols, 'LISTING_FILE', str(path))
+    monkeypatch.setattr(symbols, '_index_stamp', None)
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path / 'ohlcv'))
+    monkeypatch.setattr(data_cache, '_missing', {})
+    return path
+
+
+def test_complete_lists_prefix_matches_shortest_first():
+    index = SymbolIndex(NAMES)
+    assert index.complete('GOO') == ['GOOG', 'GOOGL']
+    assert index.complete('A') == ['AMD', 'AAPL', 'AMZN']
+    assert index.complete('A', limit=2) == ['AMD', 'AAPL']
+    assert index.complete('X') == []
+    assert 'BRK-B' in index and 'BRK' not in index and len(index) == len(NAMES)
+
+
+def test_suggest_falls_back_to_the_longest_listed_prefix():
+    index = SymbolIndex(NAMES)
+    assert index.suggest('GOOGX') == ['GOOG', 'GOOGL']
+    assert index.suggest('AMX') == ['AMD', 'AMZN']
+    assert index.suggest('ZZZ') == []
+
+
+def test_check_ticker_against_the_listing(listing):
+    assert check_ticker(' msft ') == ('MSFT', None, [])
+    assert check_ticker('') == ('', 'Enter a ticker symbol.', [])
+    assert check_ticker('MS FT')[1] == "'MS FT' is not a valid ticker symbol."
+    ticker, problem, suggestions = check_ticker('googx')
+    assert (ticker, problem, suggestions) == ('GOOGX', 'GOOGX is not a listed symbol.', ['GOOG', 'GOOGL'])
+    # Unlisted symbols pass when the caller knows them or they are already cached
+    assert check_ticker('EURUSD=X', known=['EURUSD=X'])[1] is None
+    data_cache.write_cached('^GSPC', empty_frame())
+    assert check_ticker('^GSPC')[1] is None
+
+
+def test_check_ticker_rejects_recent_misses(listing):
+    data_cache._missing['AAPL'] = time.time()
+    assert check_ticker('AAPL')[1] == 'No data was found for AAPL recently.'
+
+
+def test_listing_is_reread_when_it_changes(listing):
+    assert 'NVDA' not in symbols.get_index()
+    with open(listing, 'a', newline='') as out:
+        csv.writer(out).writerow(['NVDA', 'Nvidia'])
+    assert 'NVDA' in symbols.get_index()
+
+
+def test_missing_listing_turns_the_check_off_and_says_so(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(symbols, 'LISTING_FILE', str(tmp_path / 'none.csv'))
+    monkeypatch.setattr(symbols, '_listing_missing_logged', False)
+    monkeypatch.setattr(data_cache, '_missing', {})
+    with caplog.at_level(logging.WARNING, logger='core.symbols'):
+        assert check_ticker('ANYTHING') == ('ANYTHING', None, [])
+        check_ticker('OTHER')
+    assert len(caplog.records) == 1 and 'python -m core.symbols' in caplog.records[0].getMessage()
@@ -1,9 +1,17 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
-import plotly.graph_objs as go
 from plotly.subplots import make_subplots
+from core.charts import line_trace, ohlc_trace, volume_trace
+from core.data_cache import load_history
+from core.scheduler import as_of_caption, watch
+from core.figure_cache import styled_figure
+from core.indicator_cache import data_version
+from core.export import FORMATS, export_button
+from core.overlay import FrameOverlay
+from core.tracing import debug_panel, stage, start_rerun
+
+start_rerun('theme2')
 
 # Set page configuration
 st.set_page_config(page_title="Interactive Stock Chart App", layout="wide")
@@ -32,6 +40,19 @@ page_color_map = {
     "Light Grey": "#F5F5F5"
 }
 
+# Function to calculate the 14-day RSI of a closing price series
+def calculate_rsi(close):
+    delta = close.diff(1)
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=14).mean()
+    avg_loss = loss.rolling(window=14).mean()
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+# Keep the longest selectable period cached and refreshed for every stock, so switching stocks is a cache hit
+watch(list(stocks.values()), start=datetime.now() - timedelta(days=5*365))
+
 # Sidebar for selecting time period
 st.sidebar.header('Select Time Period')
 time_period = st.sidebar.selectbox(
@@ -95,35 +116,37 @@ elif time_period == '1 year':
 elif time_period == '3 years':
     start_date = end_date - timedelta(days=3*365)
 
-stock_data = yf.download(stocks[selected_stock], start=start_date, end=end_date)
+stage('load')
+stock_data = load_history(stocks[selected_stock], start=start_date, max_age=None)
+
+# Function to build the chart's traces; it only runs when the stock, period or data changed
+def build_chart():
+    # Create subplots
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, 
+                        subplot_titles=('Stock Price', 'RSI', 'Volume'), 
+                        row_heights=[0.5, 0.2, 0.3])
+
+    # Add Stock Price trace, with bars bucketed down to the chart's point budget
+    fig.add_trace(ohlc_trace(stock_data, 'candlestick', name='Price'), row=1, col=1)
 
-# Create subplots
-fig = make_subplots(rows=3, cols=1, shared_xaxes=True, 
-                    subplot_titles=('Stock Price', 'RSI', 'Volume'), 
-                    row_heights=[0.5, 0.2, 0.3])
+    # Calculate RSI
+    rsi = calculate_rsi(stock_data['Close'])
 
-# Add Stock Price trace
-fig.add_trace(go.Candlestick(x=stock_data.index,
-                             open=stock_data['Open'],
-                             high=stock_data['High'],
-                             low=stock_data['Low'],
-                             close=stock_data['Close'],
-                             name='Price'), row=1, col=1)
+    # Add RSI trace
+    fig.add_trace(line_trace(rsi, name='RSI (14 days)'), row=2, col=1)
 
-# Calculate RSI
-delta = stock_data['Close'].diff(1)
-gain = delta.where(delta > 0, 0)
-loss = -delta.where(delta < 0, 0)
-avg_gain = gain.rolling(window=14).mean()
-avg_loss = loss.rolling(window=14).mean()
-rs = avg_gain / avg_loss
-rsi = 100 - (100 / (1 + rs))
+    # Add Volume trace
+    fig.add_trace(volume_trace(stock_data, name='Volume'), row=3, col=1)
 
-# Add RSI trace
-fig.add_trace(go.Scatter(x=stock_data.index, y=rsi, mode='lines', name='RSI (14 days)'), row=2, col=1)
+    # Customize chart layout
+    fig.update_layout(height=900, showlegend=True)
 
-# Add Volume trace
-fig.add_trace(go.Bar(x=stock_data.index, y=stock_data['Volume'], name='Volume'), row=3, col=1)
+    # Update subplot axes titles
+    fig.update_yaxes(title_text='Price', row=1, col=1)
+    fig.update_yaxes(title_text='RSI', row=2, col=1)
+    fig.update_yaxes(title_text='Volume', row=3, col=1)
+    fig.update_xaxes(title_text='', row=1, col=1)
+    return fig
 
 # Set font and axis colors based on the selected chart background
 if chart_bg_color == '#FFFFFF':
@@ -135,35 +158,38 @@ else:
     axis_color = 'white'
     x_axis_color = 'white'  # Set x-axis color to white for other backgrounds
 
-# Customize chart layout
-fig.update_layout(
-    height=900,
-    showlegend=True,
+# Colors are a layout patch on the cached figure, so changing them does not rebuild its traces
+chart_style = dict(
     paper_bgcolor=chart_bg_color,  # Use the selected chart background color
     plot_bgcolor=chart_bg_color,    # Set the background color of the plot area
     font=dict(color=font_color)  # Set text color based on background
 )
+for row in ('', '2', '3'):
+    # Axis titles and tick labels (x-axis dates included) match the selected background
+    chart_style[f'yaxis{row}'] = dict(title_font_color=axis_color, tickfont=dict(color=axis_color))
+    chart_style[f'xaxis{row}'] = dict(title_font_color=axis_color, tickfont=dict(color=x_axis_color))
 
-# Update subplot axes titles and colors
-fig.update_yaxes(title_text='Price', title_font_color=axis_color, row=1, col=1)
-fig.update_yaxes(title_text='RSI', title_font_color=axis_color, row=2, col=1)
-fig.update_yaxes(title_text='Volume', title_font_color=axis_color, row=3, col=1)
-fig.update_xaxes(title_text='', title_font_color=axis_color, row=1, col=1)
-
-# Update tick label colors to ensure they match the selected background
-fig.update_yaxes(tickfont=dict(color=axis_color), row=1, col=1)
-fig.update_yaxes(tickfont=dict(color=axis_color), row=2, col=1)
-fig.update_yaxes(tickfont=dict(color=axis_color), row=3, col=1)
-
-# Set x-axis date color based on the background
-fig.update_xaxes(tickfont=dict(color=x_axis_color), row=1, col=1)
-fig.update_xaxes(tickfont=dict(color=x_axis_color), row=2, col=1)
-fig.update_xaxes(tickfont=dict(color=x_axis_color), row=3, col=1)
-
+stage('render')
 # Display the plotly chart
-st.plotly_chart(fig)
-
-# Export data as CSV
-if st.button('Export Data as CSV'):
-    csv_file = stock_data.to_csv(index=False)
-    st.download_button(label='Download CSV', data=csv_file, file_name=f'{selected_stock}_data.csv', mime='text/csv')
+chart_key = ('theme2', stocks[selected_stock], time_period)
+with styled_figure(chart_key, data_version(stock_data), build_chart, chart_style) as fig:
+    st.plotly_chart(fig)
+st.caption(as_of_caption([stocks[selected_stock]]))
+
+stage('export')
+# Function to get a stock's bars for the selected period, with its RSI if chosen for export
+def load_export_data(name):
+    data = FrameOverlay(load_history(stocks[name], start=start_date, max_age=None))
+    if export_rsi:
+        data['RSI'] = calculate_rsi(data['Close'])
+    return data
+
+# Export the selected period with dates; several stocks download as one zip
+st.subheader('Export Data')
+export_stocks = st.multiselect('Stocks to export', list(stocks.keys()), default=[selected_stock])
+export_rsi = st.checkbox('Include RSI (14 days)', value=True)
+export_format = st.radio('Export format', list(FORMATS), horizontal=True)
+export_button(export_stocks, load_export_data,
+              f'{export_stocks[0]}_data' if len(export_stocks) == 1 else 'stocks_data', export_format)
+
+debug_panel()